@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.server import serve
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"stand-in server did not start on port {port}")
+
+
+def get_version() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def get_percentiles(latencies: list[float]) -> dict[str, float]:
+    if len(latencies) < 2:
+        latency = latencies[0] if latencies else 0
+        return {"p50": latency, "p95": latency, "p99": latency}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+async def run_scenario(jobs: int, concurrency: int) -> dict:
+    from src import main
+    from src.schema import SearchSchema
+
+    scraping_data = SearchSchema(keywords=["openstack"], type="Repositories")
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    failed = 0
+
+    async def run_job() -> None:
+        nonlocal failed
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await main.search_records(scraping_data)
+            except Exception:
+                failed += 1
+            latencies.append(time.perf_counter() - started)
+
+    requests_before = main.scheduler.wait_stats.count
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_job() for _ in range(jobs)))
+    finally:
+        await main.close_resources()
+    elapsed = time.perf_counter() - started
+    requests = main.scheduler.wait_stats.count - requests_before
+
+    return {
+        "jobs": jobs,
+        "concurrency": concurrency,
+        "failed_jobs": failed,
+        "requests": requests,
+        "elapsed": elapsed,
+        "requests_per_second": requests / elapsed if elapsed else 0,
+        "job_latency": get_percentiles(latencies),
+        "cpu_time": time.process_time() - cpu_started,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def run_scenario_process(jobs: int, concurrency: int) -> dict:
+    """Runs a scenario in a new process, so its peak RSS is its own."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(1, mp_context=context) as executor:
+        return executor.submit(start_scenario, jobs, concurrency).result()
+
+
+def start_scenario(jobs: int, concurrency: int) -> dict:
+    return asyncio.run(run_scenario(jobs, concurrency))
+
+
+def compare(current: dict, baseline: dict) -> None:
+    for scenario, result in current["scenarios"].items():
+        previous = baseline["scenarios"].get(scenario)
+        if previous is None:
+            continue
+        for key, value, old in [
+            (
+                "requests/s",
+                result["requests_per_second"],
+                previous["requests_per_second"],
+            ),
+            (
+                "p95 latency",
+                result["job_latency"]["p95"],
+                previous["job_latency"]["p95"],
+            ),
+            ("cpu time", result["cpu_time"], previous["cpu_time"]),
+            ("peak rss", result["peak_rss_kb"], previous["peak_rss_kb"]),
+        ]:
+            change = (value - old) / old * 100 if old else 0
+            print(
+                f"{scenario:>7} {key:<12} {old:12.3f} -> {value:12.3f} ({change:+.1f}%)"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline crawler benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="sequential single jobs")
+    parser.add_argument("--jobs", type=int, default=50, help="jobs of the batch run")
+    parser.add_argument(
+        "--concurrency", type=int, default=10, help="batch jobs at once"
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency, s")
+    parser.add_argument("--jitter", type=float, default=0.02, help="latency jitter, s")
+    parser.add_argument("--error-rate", type=float, default=0, help="share of 503s")
+    parser.add_argument("--output-dir", type=Path, default=RESULTS_DIR)
+    parser.add_argument(
+        "--compare", type=Path, help="earlier result file to compare to"
+    )
+    args = parser.parse_args()
+
+    port = get_free_port()
+    # the server runs in its own process, so its CPU time and memory are not measured
+    server = multiprocessing.Process(
+        target=serve,
+        args=("127.0.0.1", port),
+        kwargs={
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+        },
+        daemon=True,
+    )
+    server.start()
+    try:
+        wait_for_port(port)
+        # always the stand-in server, a BASE_URL of the environment must not send
+        # the load to GitHub
+        os.environ["BASE_URL"] = f"http://127.0.0.1:{port}"
+        os.environ.setdefault("HOST_RATE_LIMIT", "0")
+        scenarios = {
+            "single": run_scenario_process(args.runs, 1),
+            "batch": run_scenario_process(args.jobs, args.concurrency),
+        }
+    finally:
+        server.terminate()
+        server.join()
+
+    result = {
+        "version": get_version(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "server": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+        },
+        "scenarios": scenarios,
+    }
+    print(json.dumps(result, indent=4))
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    output = (
+        args.output_dir / f"{datetime.now():%Y%m%d-%H%M%S}-{result['version']}.json"
+    )
+    output.write_text(json.dumps(result, indent=4) + "\n")
+    print(f"saved to {output}")
+
+    if args.compare:
+        compare(result, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
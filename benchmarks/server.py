@@ -0,0 +1,83 @@
+import asyncio
+import random
+import re
+from urllib.parse import urlsplit
+
+from tests.html import detail_page, search_page
+
+SEARCH_PAGE = search_page.html.encode()
+DETAIL_PAGE = detail_page.html.encode()
+RESULT_LINK = re.compile(rb'(search-title"><a href="[^"?]+)')
+
+
+class StandInServer:
+    """Local stand-in for GitHub serving the ``tests/html`` fixtures.
+
+    ``/search`` answers with the search page fixture and every other path with
+    the repository page fixture, after ``latency`` ± ``jitter`` seconds.
+    ``error_rate`` of the requests get a 503. With ``unique_details`` the
+    result links of every search page get a distinct query string, so jobs do
+    not share (and deduplicate) their detail pages.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0,
+        jitter: float = 0,
+        error_rate: float = 0,
+        unique_details: bool = True,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.unique_details = unique_details
+        self.searches = 0
+
+    def get_delay(self) -> float:
+        return max(0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def get_response(self, target: str) -> tuple[int, bytes]:
+        if random.random() < self.error_rate:
+            return 503, b"Service Unavailable"
+        if urlsplit(target).path != "/search":
+            return 200, DETAIL_PAGE
+        self.searches += 1
+        if not self.unique_details:
+            return 200, SEARCH_PAGE
+        return 200, RESULT_LINK.sub(rb"\1?v=%d" % self.searches, SEARCH_PAGE)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            # HTTP/1.1 keep-alive: serve requests until the client disconnects
+            while request_line := await reader.readline():
+                while (await reader.readline()).strip():
+                    pass
+                _, target, _ = request_line.decode("latin-1").split(" ", 2)
+                await asyncio.sleep(self.get_delay())
+                status, body = self.get_response(target)
+                writer.write(
+                    b"HTTP/1.1 %d %s\r\n"
+                    b"Content-Type: text/html; charset=utf-8\r\n"
+                    b"Content-Length: %d\r\n\r\n"
+                    % (status, b"OK" if status == 200 else b"Error", len(body))
+                )
+                writer.write(body)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        return await asyncio.start_server(self.handle, host, port)
+
+
+def serve(host: str, port: int, **options) -> None:
+    async def run() -> None:
+        server = await StandInServer(**options).start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
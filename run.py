@@ -1,8 +1,10 @@
+import argparse
 import asyncio
+import os
+import sys
 
-from src.main import get_search_results
-from src.schema import SearchSchema
-
+# crawler modules are imported by the mode that needs them, so --help and
+# argument errors do not pay for loading httpx, pydantic and parsel
 input_data = """
             {
             "keywords": [
@@ -36,6 +38,112 @@ input_data_with_proxies = """
     }
 """
 
+parser = argparse.ArgumentParser(description="GitHub search crawler")
+parser.add_argument(
+    "--batch",
+    metavar="FILE",
+    help="JSONL file with one search job per line, '-' to read jobs from stdin",
+)
+parser.add_argument(
+    "--output",
+    metavar="FILE",
+    help="file to write NDJSON batch or queue results to, stdout by default",
+)
+parser.add_argument(
+    "--enqueue",
+    metavar="FILE",
+    help="add the jobs of a JSONL file ('-' for stdin) to the shared worker queue",
+)
+parser.add_argument(
+    "--workers",
+    metavar="N",
+    type=int,
+    help="run N worker processes taking jobs from the shared queue",
+)
+parser.add_argument(
+    "--drain",
+    action="store_true",
+    help="stop the workers once the queue has no jobs left",
+)
+parser.add_argument(
+    "--results",
+    action="store_true",
+    help="write the results of the finished jobs of the shared queue as NDJSON",
+)
+parser.add_argument(
+    "--serve",
+    action="store_true",
+    help="run as a service that takes search jobs over a local HTTP API",
+)
+parser.add_argument(
+    "--stream",
+    action="store_true",
+    help="write every result as an NDJSON line as soon as its page is parsed",
+)
+args = parser.parse_args()
+
+if args.serve:
+    from src.main import settings
+    from src.service import SearchService
+
+    asyncio.run(SearchService(settings).run())
+    sys.exit()
+
+if args.enqueue:
+    from src.worker import enqueue
+
+    input_file = (
+        sys.stdin if args.enqueue == "-" else open(args.enqueue, encoding="utf-8")
+    )
+    with input_file:
+        jobs = asyncio.run(enqueue(input_file))
+    print(f"{jobs} jobs queued", file=sys.stderr)
+    sys.exit()
+
+if args.workers:
+    # the workers share parsed repositories and URL claims through the memo file
+    os.environ.setdefault("MEMO_PATH", "memo.sqlite3")
+    from src.worker import run_workers
+
+    run_workers(args.workers, args.drain)
+    sys.exit()
+
+if args.results:
+    from src.worker import write_results
+
+    output_file = (
+        open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    )
+    with output_file:
+        asyncio.run(write_results(output_file))
+    sys.exit()
+
+if args.batch:
+    from src.batch import run_batch
+
+    input_file = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+    output_file = (
+        open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    )
+    with input_file, output_file:
+        asyncio.run(run_batch(input_file, output_file))
+    sys.exit()
+
+from src.schema import SearchSchema
+
+if args.stream:
+    from src.main import write_search_results
+    from src.writer import NDJSONWriter
+
+    asyncio.run(
+        write_search_results(
+            SearchSchema.model_validate_json(input_data), NDJSONWriter(sys.stdout)
+        )
+    )
+    sys.exit()
+
+from src.main import get_search_results
+
 result = asyncio.run(
     get_search_results(SearchSchema.model_validate_json(input_data))
 )
@@ -0,0 +1,58 @@
+import asyncio
+from typing import TextIO
+
+from src import main
+from src.records import BatchRecord
+from src.schema import SearchSchema
+
+
+async def run_job(line_number: int, line: str) -> BatchRecord:
+    try:
+        scraping_data = SearchSchema.model_validate_json(line)
+        results = await main.search_records(scraping_data)
+    except Exception as exc:
+        return BatchRecord(line_number, error=f"{type(exc).__name__}: {exc}")
+    return BatchRecord(line_number, results)
+
+
+async def run_batch(input_file: TextIO, output_file: TextIO) -> int:
+    """Runs every ``SearchSchema`` job of a JSONL input and writes NDJSON results.
+
+    Lines are read one at a time and at most ``batch_concurrency`` jobs run
+    together over the shared HTTP clients and fetch scheduler, so memory does
+    not grow with the input size. A result record is written as soon as its job
+    finishes, hence records may come out of input order; ``line`` points back
+    to the job. Returns the number of jobs processed.
+    """
+    slots = asyncio.Semaphore(main.settings.batch_concurrency)
+    tasks: set[asyncio.Task] = set()
+
+    async def process(line_number: int, line: str) -> None:
+        try:
+            record = await run_job(line_number, line)
+            output_file.write(record.to_json() + "\n")
+            output_file.flush()
+        finally:
+            slots.release()
+
+    jobs = 0
+    line_number = 0
+    await main.open_resources()
+    try:
+        while True:
+            line = await asyncio.to_thread(input_file.readline)
+            if not line:
+                break
+            line_number += 1
+            if not line.strip():
+                continue
+            await slots.acquire()
+            jobs += 1
+            # every task runs in a copy of the context, so each job keeps its own proxy
+            task = asyncio.create_task(process(line_number, line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    finally:
+        await main.close_resources()
+    return jobs
@@ -0,0 +1,217 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from src.client import is_truncated
+from src.settings import Settings
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    status_code: int
+    content_type: str | None
+    etag: str | None
+    last_modified: str | None
+    body: bytes
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def get_validators(self) -> dict[str, str]:
+        validators = {}
+        if self.etag:
+            validators["If-None-Match"] = self.etag
+        if self.last_modified:
+            validators["If-Modified-Since"] = self.last_modified
+        return validators
+
+    def to_response(self) -> httpx.Response:
+        headers = {"Content-Type": self.content_type} if self.content_type else {}
+        return httpx.Response(
+            self.status_code,
+            headers=headers,
+            content=self.body,
+            request=httpx.Request("GET", self.url),
+        )
+
+    @classmethod
+    def from_response(cls, url: str, response: httpx.Response) -> "CacheEntry":
+        return cls(
+            url=url,
+            status_code=response.status_code,
+            content_type=response.headers.get("Content-Type"),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            body=response.content,
+            stored_at=time.time(),
+        )
+
+
+class ResponseCache:
+    """Persistent HTTP response cache stored in a SQLite file under ``cache_dir``.
+
+    Entries younger than ``cache_ttl`` are served without a request. Older ones
+    are revalidated with ``If-None-Match``/``If-Modified-Since`` and a 304 reuses
+    the stored body. Within ``cache_stale_while_revalidate`` seconds after
+    expiring, the stale body is returned at once and revalidated in the
+    background. The least recently used entries are evicted once the cache
+    outgrows ``cache_max_size`` bytes or was not used for ``cache_max_age``.
+    The cache is disabled while ``cache_dir`` is not set.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._revalidations: dict[str, asyncio.Task] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.settings.cache_dir)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            path = Path(self.settings.cache_dir)
+            path.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(
+                path / "responses.sqlite3", check_same_thread=False
+            )
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    status_code INTEGER NOT NULL,
+                    content_type TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    stored_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """)
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at"
+                " ON responses (accessed_at)"
+            )
+        return self._db
+
+    def _get(self, url: str) -> CacheEntry | None:
+        with self._lock:
+            db = self._connect()
+            row = db.execute(
+                "SELECT url, status_code, content_type, etag, last_modified, body,"
+                " stored_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            with db:
+                db.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE url = ?",
+                    (time.time(), url),
+                )
+            return CacheEntry(*row)
+
+    def _put(self, entry: CacheEntry) -> None:
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        entry.url,
+                        entry.status_code,
+                        entry.content_type,
+                        entry.etag,
+                        entry.last_modified,
+                        entry.body,
+                        len(entry.body),
+                        entry.stored_at,
+                        time.time(),
+                    ),
+                )
+                self._evict(db)
+
+    def _touch(self, url: str, stored_at: float) -> None:
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute(
+                    "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?",
+                    (stored_at, time.time(), url),
+                )
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        db.execute(
+            "DELETE FROM responses WHERE accessed_at < ?",
+            (time.time() - self.settings.cache_max_age,),
+        )
+        (total_size,) = db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total_size <= self.settings.cache_max_size:
+            return
+        rows = db.execute("SELECT url, size FROM responses ORDER BY accessed_at")
+        evicted = []
+        for url, size in rows:
+            if total_size <= self.settings.cache_max_size:
+                break
+            evicted.append((url,))
+            total_size -= size
+        db.executemany("DELETE FROM responses WHERE url = ?", evicted)
+
+    async def get(self, url: str) -> CacheEntry | None:
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self._get, url)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return entry.age < self.settings.cache_ttl
+
+    def can_serve_stale(self, entry: CacheEntry) -> bool:
+        max_age = self.settings.cache_ttl + self.settings.cache_stale_while_revalidate
+        return entry.age < max_age
+
+    async def update(
+        self, url: str, response: httpx.Response, entry: CacheEntry | None
+    ) -> httpx.Response:
+        """Stores a fresh response, or turns a 304 into the cached response.
+
+        Bodies cut short by ``max_body_size`` or ``stop_reading_early`` are
+        not stored, a 304 would otherwise bring back the partial page.
+        """
+        if not self.enabled:
+            return response
+        if response.status_code == 304 and entry is not None:
+            entry.stored_at = time.time()
+            await asyncio.to_thread(self._touch, url, entry.stored_at)
+            return entry.to_response()
+        if response.status_code == 200 and not is_truncated(response):
+            await asyncio.to_thread(self._put, CacheEntry.from_response(url, response))
+        return response
+
+    def revalidate_in_background(
+        self, url: str, revalidate: Callable[[], Awaitable[httpx.Response]]
+    ) -> None:
+        if url in self._revalidations:
+            return
+        task = asyncio.create_task(revalidate())
+        self._revalidations[url] = task
+        task.add_done_callback(lambda _: self._revalidations.pop(url, None))
+
+    async def aclose(self) -> None:
+        # background revalidations still need the HTTP clients, so wait for them
+        await asyncio.gather(*self._revalidations.values(), return_exceptions=True)
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
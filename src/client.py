@@ -0,0 +1,137 @@
+from collections.abc import Callable
+from importlib.util import find_spec
+
+import httpx
+
+from src.settings import Settings
+
+# httpx decodes gzip and deflate, br needs the "brotli" package, and zstd is
+# decoded here with the "zstandard" package
+ENCODINGS = [
+    ("zstd", find_spec("zstandard") is not None),
+    ("br", find_spec("brotli") is not None or find_spec("brotlicffi") is not None),
+    ("gzip", True),
+    ("deflate", True),
+]
+ACCEPT_ENCODING = ", ".join(name for name, available in ENCODINGS if available)
+
+# body headers that no longer apply once the body has been decoded
+DECODED_BODY_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+# response extension set when only a part of the body was read
+BODY_TRUNCATED = "body_truncated"
+
+
+def get_proxy_key(proxies: dict[str, str] | None) -> tuple[tuple[str, str], ...]:
+    if not proxies:
+        return ()
+    return tuple(sorted(proxies.items()))
+
+
+class ClientManager:
+    """Keeps one pooled ``httpx.AsyncClient`` per proxy.
+
+    Clients are created lazily on first use and live until ``aclose`` is
+    called, so every request made through the same proxy reuses already
+    established (keep-alive) connections instead of paying a new TCP+TLS
+    handshake per page.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._clients: dict[tuple[tuple[str, str], ...], httpx.AsyncClient] = {}
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.settings.max_connections,
+            max_keepalive_connections=self.settings.max_keepalive_connections,
+            keepalive_expiry=self.settings.keepalive_expiry,
+        )
+
+    @property
+    def http2(self) -> bool:
+        # HTTP/2 support in httpx needs the optional "h2" package
+        return self.settings.http2 and find_spec("h2") is not None
+
+    def get_proxy_mounts(
+        self, proxies: dict[str, str] | None
+    ) -> dict[str, httpx.AsyncHTTPTransport] | None:
+        if not proxies:
+            return None
+        return {
+            scheme: httpx.AsyncHTTPTransport(
+                proxy=proxy, limits=self.limits, http2=self.http2
+            )
+            for scheme, proxy in proxies.items()
+        }
+
+    def get_client(self, proxies: dict[str, str] | None = None) -> httpx.AsyncClient:
+        key = get_proxy_key(proxies)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.settings.request_timeout,
+                mounts=self.get_proxy_mounts(proxies),
+            )
+            self._clients[key] = client
+        return client
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    async def __aenter__(self) -> "ClientManager":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+
+async def read_body(
+    response: httpx.Response,
+    max_size: int,
+    is_complete: Callable[[bytearray], bool] | None = None,
+) -> tuple[bytes, bool]:
+    """Reads a streamed response body of at most ``max_size`` bytes.
+
+    Reading stops early once ``is_complete`` reports that the received part
+    holds everything that is needed. Returns the body and whether it was cut
+    short by either limit.
+    """
+    if response.headers.get("Content-Encoding", "").lower() == "zstd":
+        import zstandard
+
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        chunks = (
+            decompressor.decompress(chunk) async for chunk in response.aiter_raw()
+        )
+    else:
+        chunks = response.aiter_bytes()
+
+    buffer = bytearray()
+    truncated = False
+    async for chunk in chunks:
+        buffer += chunk
+        if len(buffer) > max_size:
+            del buffer[max_size:]
+            truncated = True
+            break
+        if is_complete is not None and is_complete(buffer):
+            truncated = True
+            break
+    return bytes(buffer), truncated
+
+
+def is_truncated(response: httpx.Response) -> bool:
+    return response.extensions.get(BODY_TRUNCATED, False)
+
+
+def get_decoded_headers(response: httpx.Response) -> list[tuple[str, str]]:
+    return [
+        (name, value)
+        for name, value in response.headers.items()
+        if name.lower() not in DECODED_BODY_HEADERS
+    ]
@@ -0,0 +1,44 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from src.settings import Settings
+
+
+class ParseExecutor:
+    """Runs HTML parsing inline, in a thread pool or in a process pool.
+
+    ``inline`` parses on the event loop, which is the cheapest choice for a
+    single job. ``thread`` and ``process`` move the CPU bound work off the loop
+    so fetching goes on while pages are parsed; ``process`` uses every core.
+    Parse functions get raw response bytes, which are cheaper to hand over to
+    a worker than decoded text.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._pool: Executor | None = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.settings.parse_executor == "process":
+                self._pool = ProcessPoolExecutor(self.settings.parse_workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    self.settings.parse_workers, thread_name_prefix="parser"
+                )
+        return self._pool
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.settings.parse_executor == "inline":
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), partial(func, *args))
+
+    async def aclose(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            # waiting for the workers would block the event loop
+            await asyncio.to_thread(pool.shutdown)
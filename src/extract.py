@@ -0,0 +1,115 @@
+import re
+
+from lxml import etree, html
+
+from src import xpath
+
+OWNER = etree.XPath(xpath.OWNER)
+LANGUAGES = etree.XPath(xpath.LANGUAGES)
+LANGUAGE_TITLE = etree.XPath(xpath.LANGUAGE_TITLE)
+LANGUAGE_PERCENT = etree.XPath(xpath.LANGUAGE_PERCENT)
+PERCENT = re.compile(r"\d+\.?\d+")
+
+OWNER_MARKER = re.compile(rb'rel="author"')
+LANGUAGES_MARKER = re.compile(rb"<h2[^>]*>\s*Languages?\s*</h2>")
+
+
+def find_open_tag(body: bytes, start_tag: bytes, position: int) -> int:
+    """Returns where the innermost ``start_tag`` still open at ``position`` starts.
+
+    Tags of the same name that are opened and closed before ``position`` are
+    skipped, so ``<div><div></div><h2>`` finds the outer ``<div``.
+    """
+    close_tag = b"</" + start_tag[1:]
+    depth = 0
+    while True:
+        start = body.rfind(start_tag, 0, position)
+        close = body.rfind(close_tag, 0, position)
+        if close > start:
+            depth += 1
+            position = close
+        elif start == -1 or depth == 0:
+            return start
+        else:
+            depth -= 1
+            position = start
+
+
+def find_region(
+    body: bytes, marker: re.Pattern, start_tag: bytes, end_tag: bytes
+) -> bytes | None:
+    """Returns the bytes from the tag still open at ``marker`` up to ``end_tag``."""
+    match = marker.search(body)
+    if match is None:
+        return None
+    start = find_open_tag(body, start_tag, match.start())
+    end = body.find(end_tag, match.end())
+    if start == -1 or end == -1:
+        return None
+    return body[start : end + len(end_tag)]
+
+
+class DetailSectionsCheck:
+    """Tells when a partly received detail page holds the owner and languages.
+
+    Every call only scans the bytes received since the previous one.
+    """
+
+    def __init__(self):
+        self.position = 0
+        self.owner_found = False
+        self.languages_end: int | None = None
+
+    def __call__(self, buffer: bytearray) -> bool:
+        # markers may be split between two chunks
+        start = max(0, self.position - 256)
+        self.position = len(buffer)
+        if not self.owner_found:
+            self.owner_found = OWNER_MARKER.search(buffer, start) is not None
+        if self.languages_end is None:
+            match = LANGUAGES_MARKER.search(buffer, start)
+            if match is None:
+                return False
+            self.languages_end = match.end()
+        end = buffer.find(b"</ul>", max(start, self.languages_end))
+        return self.owner_found and end != -1
+
+
+def parse_html(body: bytes, encoding: str) -> html.HtmlElement:
+    parser = html.HTMLParser(encoding=encoding)
+    return html.document_fromstring(body, parser=parser)
+
+
+def extract_owner(root: html.HtmlElement) -> str:
+    return OWNER(root)
+
+
+def extract_languages(root: html.HtmlElement) -> dict[str, float]:
+    result = {}
+    for language in LANGUAGES(root):
+        lang = LANGUAGE_TITLE(language)[0]
+        perc = PERCENT.search(LANGUAGE_PERCENT(language)[0]).group()
+        result[str(lang)] = float(perc)
+    return result
+
+
+def extract_detail(
+    page_body: bytes, encoding: str = "utf-8"
+) -> tuple[str, dict[str, float]]:
+    """Extracts the owner and languages without parsing the whole page.
+
+    Only the regions around the author link and the languages list are parsed,
+    with precompiled XPath expressions. If a region can not be found, or its
+    languages list comes out empty because the page is laid out differently,
+    the whole page is parsed instead.
+    """
+    owner_region = find_region(page_body, OWNER_MARKER, b"<a", b"</a>")
+    languages_region = find_region(page_body, LANGUAGES_MARKER, b"<div", b"</ul>")
+    if owner_region is not None and languages_region is not None:
+        owner = extract_owner(parse_html(owner_region, encoding))
+        languages = extract_languages(parse_html(languages_region, encoding))
+        if owner and languages:
+            return owner, languages
+
+    document = parse_html(page_body, encoding)
+    return extract_owner(document), extract_languages(document)
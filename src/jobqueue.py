@@ -0,0 +1,241 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.settings import Settings
+
+
+@dataclass
+class Job:
+    id: int
+    payload: str
+    attempts: int
+
+
+class JobQueue(ABC):
+    """Queue of ``SearchSchema`` jobs shared by worker processes.
+
+    A leased job belongs to one worker until its lease runs out, so the job
+    of a worker that died is leased again by another one, up to
+    ``queue_max_attempts`` times. Finished jobs keep their results, which
+    makes the queue the common result sink of all workers.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+
+    @abstractmethod
+    async def put(self, payloads: list[str]) -> list[int]:
+        pass
+
+    @abstractmethod
+    async def lease(self, worker_id: str) -> Job | None:
+        pass
+
+    @abstractmethod
+    async def extend(self, jobs: list[Job], worker_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def complete(self, job: Job, worker_id: str, results: str) -> None:
+        """Stores the JSON list of results of a finished job."""
+
+    @abstractmethod
+    async def fail(
+        self, job: Job, worker_id: str, error: str, retry: bool = True
+    ) -> None:
+        pass
+
+    @abstractmethod
+    async def count(self) -> dict[str, int]:
+        """Returns the number of jobs by status."""
+
+    @abstractmethod
+    def iter_results(self) -> AsyncIterator[str]:
+        """Yields a ``JobResultSchema`` JSON line for every finished or failed job."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue in a SQLite file at ``queue_path``, for workers on one host.
+
+    SQLite locking is not reliable on network file systems, workers on
+    several hosts need a backend on a server.
+    """
+
+    def __init__(self, settings: Settings):
+        super().__init__(settings)
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            path = Path(self.settings.queue_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            # readers do not block the worker that writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    leased_by TEXT,
+                    lease_until REAL,
+                    results TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    finished_at REAL
+                )
+                """)
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)"
+            )
+        return self._db
+
+    def _put(self, payloads: list[str]) -> list[int]:
+        with self._lock:
+            db = self._connect()
+            with db:
+                return [
+                    db.execute(
+                        "INSERT INTO jobs (payload, created_at) VALUES (?, ?)",
+                        (payload, time.time()),
+                    ).lastrowid
+                    for payload in payloads
+                ]
+
+    def _lease(self, worker_id: str) -> Job | None:
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?,"
+                    " error = 'lease expired ' || attempts || ' times'"
+                    " WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                    (now, now, self.settings.queue_max_attempts),
+                )
+                # one statement, so two workers can not lease the same job
+                row = db.execute(
+                    "UPDATE jobs SET status = 'leased', leased_by = ?,"
+                    " lease_until = ?, attempts = attempts + 1"
+                    " WHERE id = (SELECT id FROM jobs WHERE status = 'queued'"
+                    " OR (status = 'leased' AND lease_until < ?) ORDER BY id LIMIT 1)"
+                    " RETURNING id, payload, attempts",
+                    (worker_id, now + self.settings.queue_lease, now),
+                ).fetchone()
+        return Job(*row) if row else None
+
+    def _extend(self, job_ids: list[int], worker_id: str) -> None:
+        lease_until = time.time() + self.settings.queue_lease
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.executemany(
+                    "UPDATE jobs SET lease_until = ?"
+                    " WHERE id = ? AND status = 'leased' AND leased_by = ?",
+                    [(lease_until, job_id, worker_id) for job_id in job_ids],
+                )
+
+    def _finish(
+        self,
+        job: Job,
+        worker_id: str,
+        status: str,
+        results: str | None = None,
+        error: str | None = None,
+    ) -> None:
+        with self._lock:
+            db = self._connect()
+            with db:
+                # a worker that lost its lease must not overwrite the new attempt
+                db.execute(
+                    "UPDATE jobs SET status = ?, results = ?, error = ?,"
+                    " finished_at = ?, leased_by = NULL, lease_until = NULL"
+                    " WHERE id = ? AND status = 'leased' AND leased_by = ?",
+                    (
+                        status,
+                        results,
+                        error,
+                        time.time() if status != "queued" else None,
+                        job.id,
+                        worker_id,
+                    ),
+                )
+
+    def _read_results(self, last_id: int) -> list[tuple[int, str | None, str | None]]:
+        with self._lock:
+            return (
+                self._connect()
+                .execute(
+                    "SELECT id, results, error FROM jobs WHERE id > ?"
+                    " AND status IN ('done', 'failed') ORDER BY id LIMIT 1000",
+                    (last_id,),
+                )
+                .fetchall()
+            )
+
+    def _count(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            )
+            return dict(rows.fetchall())
+
+    async def put(self, payloads: list[str]) -> list[int]:
+        return await asyncio.to_thread(self._put, payloads)
+
+    async def lease(self, worker_id: str) -> Job | None:
+        return await asyncio.to_thread(self._lease, worker_id)
+
+    async def extend(self, jobs: list[Job], worker_id: str) -> None:
+        job_ids = [job.id for job in jobs]
+        await asyncio.to_thread(self._extend, job_ids, worker_id)
+
+    async def complete(self, job: Job, worker_id: str, results: str) -> None:
+        await asyncio.to_thread(self._finish, job, worker_id, "done", results)
+
+    async def fail(
+        self, job: Job, worker_id: str, error: str, retry: bool = True
+    ) -> None:
+        retry = retry and job.attempts < self.settings.queue_max_attempts
+        status = "queued" if retry else "failed"
+        await asyncio.to_thread(self._finish, job, worker_id, status, None, error)
+
+    async def count(self) -> dict[str, int]:
+        return await asyncio.to_thread(self._count)
+
+    async def iter_results(self) -> AsyncIterator[str]:
+        last_id = 0
+        while True:
+            # read in chunks, the lock is not held while the caller writes
+            rows = await asyncio.to_thread(self._read_results, last_id)
+            if not rows:
+                return
+            for job_id, results, error in rows:
+                error = json.dumps(error) if error is not None else "null"
+                yield f'{{"job":{job_id},"results":{results or "[]"},"error":{error}}}'
+            last_id = rows[-1][0]
+
+    async def aclose(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+QUEUE_BACKENDS: dict[str, type[JobQueue]] = {"sqlite": SQLiteJobQueue}
+
+
+def get_job_queue(settings: Settings) -> JobQueue:
+    return QUEUE_BACKENDS[settings.queue_backend](settings)
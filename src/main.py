@@ -1,53 +1,297 @@
 import asyncio
 import contextvars
+import functools
 import random
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from functools import partial
+from typing import Any
 from urllib.parse import urlencode, urljoin
 
 import httpx
 from fake_useragent import UserAgent
 from parsel import Selector
 
-from src import xpath
-from src.schema import Extra, SearchDataSchema, SearchResultSchema, SearchSchema
+from src import extract, xpath
+from src.cache import CacheEntry, ResponseCache
+from src.client import (
+    ACCEPT_ENCODING,
+    BODY_TRUNCATED,
+    ClientManager,
+    get_decoded_headers,
+    read_body,
+)
+from src.executor import ParseExecutor
+from src.memo import DetailMemo
+from src.metrics import Metrics
+from src.planner import plan_queries
+from src.proxy_pool import ProxyPool
+from src.records import DetailRecord, ResultRecord, dumps_list, to_search_result
+from src.retry import (
+    RETRY_STATUSES,
+    LatencyTracker,
+    RetryBudget,
+    first_successful,
+    get_backoff,
+)
+from src.scheduler import FetchScheduler
+from src.schema import SearchResultSchema, SearchSchema
 from src.settings import Settings
+from src.strategies import REPOSITORY_STRATEGY, SearchStrategy, get_search_strategy
+from src.writer import ResultWriter
 
 settings = Settings()
 
+metrics = Metrics(settings)
+client_manager = ClientManager(settings)
+scheduler = FetchScheduler(
+    settings, on_wait=partial(metrics.observe, "queue_wait_seconds")
+)
+response_cache = ResponseCache(settings)
+detail_memo = DetailMemo(settings)
+proxy_pool = ProxyPool(settings)
+parse_executor = ParseExecutor(settings)
+retry_budget = RetryBudget(settings)
+latency_tracker = LatencyTracker(settings)
+
 shared_proxy = contextvars.ContextVar("shared_proxy")
+shared_proxy_list = contextvars.ContextVar("shared_proxy_list", default=None)
+# proxies already used for the current page, retries and hedges avoid them
+shared_tried_proxies = contextvars.ContextVar("shared_tried_proxies", default=None)
+# creates a check telling when enough of a page body has been read
+shared_body_check = contextvars.ContextVar("shared_body_check", default=None)
+
+# answers that mean the proxy is refused or rate limited; 5xx answers of the
+# target are left to the retry loop, an outage must not quarantine every proxy
+PROXY_FAILURE_STATUSES = {407, 429}
+
+
+def get_proxy_mapping(proxy: str) -> dict[str, str]:
+    return {"http://": proxy, "https://": proxy}
 
 
 def select_random_proxy(proxy_list: list[str]) -> dict[str, str] | None:
     if not proxy_list:
         return None
     selected_proxy = random.choice(proxy_list)
-    return {"http://": selected_proxy, "https://": selected_proxy}
+    return get_proxy_mapping(selected_proxy)
+
 
+def set_job_proxies(proxy_list: list[str] | None) -> None:
+    if settings.proxy_mode == "random":
+        shared_proxy.set(select_random_proxy(proxy_list))
+        shared_proxy_list.set(None)
+    else:
+        shared_proxy.set(None)
+        shared_proxy_list.set(proxy_list or None)
 
-def get_search_url(scraping_data: SearchSchema) -> str:
-    query_params = scraping_data.get_query_params()
+
+def get_search_url(scraping_data: SearchSchema, query: str | None = None) -> str:
+    query_params = scraping_data.get_query_params(query)
     encodec_params = urlencode(query_params)
     return f"{settings.base_url}/search?{encodec_params}"
 
 
+def get_search_urls(scraping_data: SearchSchema) -> list[str]:
+    queries = plan_queries(scraping_data.keywords, settings)
+    return [get_search_url(scraping_data, query) for query in queries]
+
+
 async def get_page_html(url: str) -> httpx.Response:
-    proxies = shared_proxy.get()
-    print("proxy:", proxies, "url:", url)
-    headers = get_headers()
-    async with httpx.AsyncClient(headers=headers, proxies=proxies) as client:
-        response = await client.get(url, timeout=10)
-        return response
+    entry = await response_cache.get(url)
+    if entry is not None and response_cache.is_fresh(entry):
+        return entry.to_response()
+    if entry is not None and response_cache.can_serve_stale(entry):
+        response_cache.revalidate_in_background(
+            url, partial(revalidate_page, url, entry)
+        )
+        return entry.to_response()
+    return await revalidate_page(url, entry)
+
+
+def uses_failover() -> bool:
+    return bool(shared_proxy_list.get()) and settings.proxy_failover_attempts > 1
+
+
+async def get_page_html_with_retries(url: str, hedge: bool = False) -> httpx.Response:
+    """Fetches a page within ``request_deadline``, retrying failures.
+
+    Retries back off with jitter and are limited by the global retry budget.
+    Transport errors and proxy failure statuses that ``fetch_page`` already
+    failed over on are not retried again, so the two layers do not multiply.
+    With ``hedge`` and ``hedging`` enabled, a request slower than the observed
+    p95 network latency is duplicated through another proxy.
+    """
+    shared_tried_proxies.set(set())
+    failover = uses_failover()
+    retry_statuses = RETRY_STATUSES
+    if failover:
+        retry_statuses = RETRY_STATUSES - PROXY_FAILURE_STATUSES
+    attempt = 0
+    while True:
+        retry_budget.record_request()
+        hedge_delay = None
+        if hedge and settings.hedging:
+            hedge_delay = latency_tracker.get_hedge_delay()
+        try:
+            response = await asyncio.wait_for(
+                first_successful(partial(get_page_html, url), hedge_delay),
+                settings.request_deadline,
+            )
+        except (httpx.HTTPError, TimeoutError) as exc:
+            if failover and isinstance(exc, httpx.TransportError):
+                raise
+            if attempt >= settings.max_retries or not retry_budget.try_spend():
+                raise
+        else:
+            if response.status_code not in retry_statuses:
+                return response
+            if attempt >= settings.max_retries or not retry_budget.try_spend():
+                return response
+        metrics.inc("retries_total")
+        await asyncio.sleep(get_backoff(attempt, settings))
+        attempt += 1
+
+
+async def revalidate_page(url: str, entry: CacheEntry | None = None) -> httpx.Response:
+    validators = entry.get_validators() if entry is not None else {}
+    response = await fetch_page(url, validators)
+    return await response_cache.update(url, response, entry)
+
+
+async def fetch_page(url: str, headers: dict[str, str] | None = None) -> httpx.Response:
+    """Requests a page, failing over to other proxies of the job's proxy list.
+
+    Every attempt waits for its own slot and host token, and every failover
+    is paid from the retry budget.
+    """
+    proxy_list = shared_proxy_list.get()
+    if not proxy_list:
+        request = partial(request_page, url, shared_proxy.get(), headers)
+        return await scheduler.submit(url, request)
+
+    tried = shared_tried_proxies.get()
+    if tried is None:
+        tried = set()
+    for attempt in range(1, settings.proxy_failover_attempts + 1):
+        proxy = proxy_pool.select(proxy_list, exclude=tried)
+        tried.add(proxy)
+        is_last = attempt == settings.proxy_failover_attempts
+        try:
+            response = await scheduler.submit(
+                url, partial(request_proxy_page, url, proxy, headers)
+            )
+        except httpx.TransportError:
+            if is_last or not retry_budget.try_spend():
+                raise
+        else:
+            if response.status_code not in PROXY_FAILURE_STATUSES:
+                return response
+            if is_last or not retry_budget.try_spend():
+                return response
+        metrics.inc("retries_total")
+
+
+async def request_proxy_page(
+    url: str, proxy: str, headers: dict[str, str] | None = None
+) -> httpx.Response:
+    """Requests a page through ``proxy`` and records the outcome in the proxy pool."""
+    started = time.monotonic()
+    try:
+        response = await request_page(url, get_proxy_mapping(proxy), headers)
+    except httpx.TransportError:
+        proxy_pool.record_failure(proxy)
+        raise
+    if response.status_code in PROXY_FAILURE_STATUSES:
+        proxy_pool.record_failure(proxy)
+    else:
+        proxy_pool.record_success(proxy, time.monotonic() - started)
+    return response
+
+
+async def request_page(
+    url: str, proxies: dict[str, str] | None, headers: dict[str, str] | None = None
+) -> httpx.Response:
+    client = client_manager.get_client(proxies)
+    trace = metrics.create_trace()
+    proxy = proxies["https://"] if proxies else "direct"
+    body_check = shared_body_check.get()
+    is_complete = body_check() if body_check and settings.stop_reading_early else None
+    started = time.perf_counter()
+    try:
+        async with client.stream(
+            "GET",
+            url,
+            headers={**get_headers(), **(headers or {})},
+            extensions={"trace": trace} if trace is not None else None,
+        ) as stream:
+            body, truncated = await read_body(
+                stream,
+                settings.max_body_size,
+                is_complete if stream.status_code == 200 else None,
+            )
+        response = httpx.Response(
+            stream.status_code,
+            headers=get_decoded_headers(stream),
+            content=body,
+            request=stream.request,
+            extensions={BODY_TRUNCATED: truncated},
+        )
+    except httpx.HTTPError:
+        metrics.record_request(proxy, time.perf_counter() - started, trace=trace)
+        raise
+    elapsed = time.perf_counter() - started
+    metrics.record_request(
+        proxy, elapsed, response.status_code, stream.num_bytes_downloaded, trace
+    )
+    if response.status_code not in RETRY_STATUSES:
+        # network time only, cache hits and queue waits would pull the hedge delay down
+        latency_tracker.add(elapsed)
+    return response
+
+
+async def parse_page(parse: Callable[..., Any], *args: Any) -> Any:
+    started = time.perf_counter()
+    result = await parse_executor.run(parse, *args)
+    metrics.observe("parse_seconds", time.perf_counter() - started)
+    return result
+
+
+async def open_resources() -> None:
+    await metrics.start_server()
+
+
+async def close_resources() -> None:
+    detail_memo.clear()
+    await parse_executor.aclose()
+    await response_cache.aclose()
+    await client_manager.aclose()
+    await metrics.aclose()
+
+
+@functools.cache
+def get_user_agent() -> UserAgent:
+    # loading the user agent data once is enough, every request still gets a random one
+    return UserAgent(platforms="pc")
 
 
 def get_headers() -> dict[str, str]:
-    user_agent = UserAgent(platforms="pc")
     return {
-        "User-Agent": user_agent.random,
+        "User-Agent": get_user_agent().random,
         "Accept": "text/html",
+        "Accept-Encoding": ACCEPT_ENCODING,
     }
 
 
-def parse_search_page(page_body: str) -> list[str]:
-    selector = Selector(page_body)
+def make_selector(page_body: str | bytes, encoding: str = "utf-8") -> Selector:
+    if isinstance(page_body, bytes):
+        return Selector(body=page_body, encoding=encoding)
+    return Selector(page_body)
+
+
+def parse_search_page(page_body: str | bytes, encoding: str = "utf-8") -> list[str]:
+    selector = make_selector(page_body, encoding)
     links = selector.xpath(xpath.SEARCH_RESULTS).getall()
     return links
 
@@ -62,36 +306,301 @@ def parse_languages(selector: Selector) -> dict[str, float]:
     return result
 
 
+def parse_detail_body(
+    url: str, page_body: str | bytes, encoding: str = "utf-8"
+) -> ResultRecord:
+    if settings.extractor == "lxml":
+        if isinstance(page_body, str):
+            page_body, encoding = page_body.encode(), "utf-8"
+        owner, language_stats = extract.extract_detail(page_body, encoding)
+    else:
+        selector = make_selector(page_body, encoding)
+        owner = selector.xpath(xpath.OWNER).get("not found")
+        language_stats = parse_languages(selector)
+    return ResultRecord(url, DetailRecord.create(owner, language_stats))
+
+
+def parse_detail_page(response: httpx.Response) -> ResultRecord:
+    return parse_detail_body(str(response.url), response.content, response.encoding)
+
+
+async def load_search_detail(url: str) -> ResultRecord:
+    async with detail_memo.claim(url) as extra:
+        if extra is not None:
+            # another worker process fetched the page while this one waited
+            return ResultRecord(url, extra)
+        shared_body_check.set(extract.DetailSectionsCheck)
+        response = await get_page_html_with_retries(url, hedge=True)
+        if not response.is_success:
+            # an error page has no owner or languages, parsing it gives an empty result
+            return ResultRecord(url, error=f"HTTP {response.status_code}")
+        result = await parse_page(
+            parse_detail_body, str(response.url), response.content, response.encoding
+        )
+        await detail_memo.put(url, result.extra)
+    return result
+
+
+async def fetch_search_detail(url: str) -> ResultRecord:
+    detail_url = urljoin(settings.base_url, url)
+    extra = await detail_memo.get(detail_url)
+    if extra is not None:
+        return ResultRecord(detail_url, extra)
+    try:
+        return await detail_memo.deduplicate(
+            detail_url, partial(load_search_detail, detail_url)
+        )
+    except Exception as exc:
+        # one broken page must not fail the whole job
+        return ResultRecord(detail_url, error=f"{type(exc).__name__}: {exc}")
+
+
 async def parse_search_details(details_urls: list[str]) -> SearchResultSchema:
+    # every page is parsed as soon as it arrives, so response bodies
+    # are not kept around until the slowest page is downloaded
+    tasks = [asyncio.create_task(fetch_search_detail(url)) for url in details_urls]
+    results: list[ResultRecord] = await asyncio.gather(*tasks)
+    return to_search_result(results)
+
+
+async def iter_search_details(
+    details_urls: list[str],
+) -> AsyncIterator[ResultRecord]:
+    """Yields search details in the order the detail pages complete."""
+    tasks = [asyncio.create_task(fetch_search_detail(url)) for url in details_urls]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def get_page_url(search_url: str, page: int) -> str:
+    return search_url if page == 1 else f"{search_url}&p={page}"
+
+
+async def fetch_search_links(url: str) -> list[str]:
+    response = await get_page_html_with_retries(url)
+    # a search page that still failed after the retries fails the job
+    response.raise_for_status()
+    return await parse_page(parse_search_page, response.content, response.encoding)
+
+
+async def iter_search_links(
+    search_url: str, max_pages: int = 1, max_results: int | None = None
+) -> AsyncIterator[list[str]]:
+    """Yields the result links of every search page, up to the given limits.
+
+    The next page is requested before the links of the current one are
+    yielded, so it downloads while the caller fetches the current details.
+    A failed first page fails the search, a later one ends it with the
+    results found so far.
+    """
+    remaining = max_results
+    next_page = asyncio.create_task(fetch_search_links(search_url))
+    try:
+        for page in range(1, max_pages + 1):
+            try:
+                links = await next_page
+            except Exception:
+                if page == 1:
+                    raise
+                metrics.inc("search_page_errors_total")
+                break
+            if remaining is not None:
+                links = links[:remaining]
+                remaining -= len(links)
+            is_last = page == max_pages or not links or remaining == 0
+            if not is_last:
+                next_page = asyncio.create_task(
+                    fetch_search_links(get_page_url(search_url, page + 1))
+                )
+            if links:
+                yield links
+            if is_last:
+                break
+    finally:
+        next_page.cancel()
+
+
+async def merge_search_links(
+    search_urls: list[str], max_pages: int = 1, max_results: int | None = None
+) -> AsyncIterator[list[str]]:
+    """Runs several searches at once and yields their pages as they arrive."""
+    if len(search_urls) == 1:
+        async with aclosing(
+            iter_search_links(search_urls[0], max_pages, max_results)
+        ) as pages:
+            async for links in pages:
+                yield links
+        return
+
+    # a bounded queue keeps the searches from running far ahead of the caller
+    arrived: asyncio.Queue = asyncio.Queue(maxsize=len(search_urls))
+
+    async def run_search(search_url: str) -> None:
+        try:
+            async with aclosing(
+                iter_search_links(search_url, max_pages, max_results)
+            ) as pages:
+                async for links in pages:
+                    await arrived.put(links)
+        except Exception as exc:
+            await arrived.put(exc)
+        else:
+            await arrived.put(None)
+
+    tasks = [asyncio.create_task(run_search(url)) for url in search_urls]
+    try:
+        running = len(tasks)
+        while running:
+            links = await arrived.get()
+            if isinstance(links, Exception):
+                raise links
+            if links is None:
+                running -= 1
+            else:
+                yield links
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def iter_unique_links(
+    search_urls: list[str], max_pages: int = 1, max_results: int | None = None
+) -> AsyncIterator[list[str]]:
+    """Yields the links of all searches, every link only the first time it is found.
+
+    ``max_results`` counts unique links, so searches that overlap widen the
+    coverage without fetching a detail page twice.
+    """
+    seen: set[str] = set()
+    remaining = max_results
+    async with aclosing(
+        merge_search_links(search_urls, max_pages, max_results)
+    ) as pages:
+        async for links in pages:
+            unique = [link for link in dict.fromkeys(links) if link not in seen]
+            metrics.inc("duplicate_links_total", len(links) - len(unique))
+            if remaining is not None:
+                unique = unique[:remaining]
+                remaining -= len(unique)
+            seen.update(unique)
+            if unique:
+                yield unique
+            if remaining == 0:
+                break
+
+
+def as_url_list(url: str | list[str]) -> list[str]:
+    return [url] if isinstance(url, str) else url
+
+
+async def collect_records(
+    url: str | list[str],
+    strategy: SearchStrategy = REPOSITORY_STRATEGY,
+    max_pages: int = 1,
+    max_results: int | None = None,
+) -> list[ResultRecord]:
     results = []
+    detail_tasks = []
+    try:
+        async with aclosing(
+            iter_unique_links(as_url_list(url), max_pages, max_results)
+        ) as pages:
+            async for links in pages:
+                if strategy.fetch_details:
+                    # details of this page are fetched while the next page downloads
+                    detail_tasks.extend(
+                        asyncio.create_task(fetch_search_detail(link)) for link in links
+                    )
+                else:
+                    results.extend(strategy.parse_results(links, settings.base_url))
+        if detail_tasks:
+            results = await asyncio.gather(*detail_tasks)
+    finally:
+        # a failed search or a cancelled job must not leave detail fetches running
+        for task in detail_tasks:
+            task.cancel()
+    return results
 
-    tasks = [
-        asyncio.create_task(get_page_html(urljoin(settings.base_url, url)))
-        for url in details_urls
-    ]
-    responses: tuple[httpx.Response] = await asyncio.gather(*tasks)
 
-    for response in responses:
-        selector = Selector(response.text)
-        owner = selector.xpath(xpath.OWNER).get("not found")
-        language_stats = parse_languages(selector)
-        extra = Extra(owner=owner, language_stats=language_stats)
-        results.append(SearchDataSchema(url=str(response.url), extra=extra))
+async def collect_data(
+    url: str | list[str],
+    strategy: SearchStrategy = REPOSITORY_STRATEGY,
+    max_pages: int = 1,
+    max_results: int | None = None,
+) -> SearchResultSchema:
+    records = await collect_records(url, strategy, max_pages, max_results)
+    return to_search_result(records)
 
-    return SearchResultSchema(results)
 
+async def iter_collect_data(
+    url: str | list[str],
+    strategy: SearchStrategy = REPOSITORY_STRATEGY,
+    max_pages: int = 1,
+    max_results: int | None = None,
+) -> AsyncIterator[ResultRecord]:
+    async with aclosing(
+        iter_unique_links(as_url_list(url), max_pages, max_results)
+    ) as pages:
+        async for links in pages:
+            if strategy.fetch_details:
+                # closed at once when the consumer stops, which cancels the fetches
+                async with aclosing(iter_search_details(links)) as details:
+                    async for item in details:
+                        yield item
+            else:
+                for item in strategy.parse_results(links, settings.base_url):
+                    yield item
 
-async def collect_data(url: str) -> SearchResultSchema:
-    response = await get_page_html(url)
-    result_detail_links = parse_search_page(response.text)
-    result: SearchResultSchema = await parse_search_details(result_detail_links)
-    return result
+
+async def search_records(scraping_data: SearchSchema) -> list[ResultRecord]:
+    set_job_proxies(scraping_data.proxies)
+
+    return await collect_records(
+        get_search_urls(scraping_data),
+        get_search_strategy(scraping_data),
+        scraping_data.max_pages,
+        scraping_data.max_results,
+    )
+
+
+async def search(scraping_data: SearchSchema) -> SearchResultSchema:
+    return to_search_result(await search_records(scraping_data))
+
+
+async def iter_search(scraping_data: SearchSchema) -> AsyncIterator[ResultRecord]:
+    set_job_proxies(scraping_data.proxies)
+
+    search_urls = get_search_urls(scraping_data)
+    strategy = get_search_strategy(scraping_data)
+    async for item in iter_collect_data(
+        search_urls, strategy, scraping_data.max_pages, scraping_data.max_results
+    ):
+        yield item
 
 
 async def get_search_results(scraping_data: SearchSchema) -> str:
-    selected_random_proxy = select_random_proxy(scraping_data.proxies)
-    shared_proxy.set(selected_random_proxy)
+    await open_resources()
+    try:
+        results = await search_records(scraping_data)
+    finally:
+        await close_resources()
+    return dumps_list(results, indent=4)
+
 
-    search_url = get_search_url(scraping_data)
-    results: SearchResultSchema = await collect_data(search_url)
-    return results.model_dump_json(indent=4)
+async def write_search_results(
+    scraping_data: SearchSchema, writer: ResultWriter
+) -> int:
+    count = 0
+    await open_resources()
+    try:
+        with writer:
+            async for item in iter_search(scraping_data):
+                writer.write(item)
+                count += 1
+    finally:
+        await close_resources()
+    return count
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+from src.records import DetailRecord, dumps
+from src.settings import Settings
+
+
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any | None:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class DetailMemo:
+    """Shares detail page work between all jobs of a run.
+
+    Concurrent requests for the same repository URL wait for one shared
+    fetch, and parsed ``DetailRecord`` objects are kept in a bounded in-memory LRU
+    for ``memo_ttl`` seconds. With ``memo_path`` set they are also stored in a
+    SQLite file and reused by later runs, and processes sharing the file claim
+    a URL before fetching it, so worker processes do not download the same
+    repository at the same time.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._memo = LRUCache(settings.memo_size)
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self.owner = uuid.uuid4().hex
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            path = Path(self.settings.memo_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS extras"
+                " (url TEXT PRIMARY KEY, extra TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS claims"
+                " (url TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+        return self._db
+
+    def _load(self, url: str) -> tuple[float, DetailRecord] | None:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT stored_at, extra FROM extras"
+                    " WHERE url = ? AND stored_at > ?",
+                    (url, time.time() - self.settings.memo_ttl),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        return row[0], DetailRecord.create(**json.loads(row[1]))
+
+    def _store(self, url: str, extra: DetailRecord) -> None:
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO extras VALUES (?, ?, ?)",
+                    (url, dumps(extra), time.time()),
+                )
+
+    def _claim(self, url: str) -> bool:
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute(
+                    "DELETE FROM claims WHERE url = ? AND expires_at < ?", (url, now)
+                )
+                db.execute(
+                    "INSERT OR IGNORE INTO claims VALUES (?, ?, ?)",
+                    (url, self.owner, now + self.settings.memo_claim_ttl),
+                )
+                (owner,) = db.execute(
+                    "SELECT owner FROM claims WHERE url = ?", (url,)
+                ).fetchone()
+        return owner == self.owner
+
+    def _release(self, url: str) -> None:
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute(
+                    "DELETE FROM claims WHERE url = ? AND owner = ?", (url, self.owner)
+                )
+
+    async def get(self, url: str) -> DetailRecord | None:
+        entry = self._memo.get(url)
+        if entry is None and self.settings.memo_path:
+            entry = await asyncio.to_thread(self._load, url)
+            if entry is not None:
+                self._memo.put(url, entry)
+        # a long-running service keeps the memo, so entries expire in memory too
+        if entry is None or entry[0] < time.time() - self.settings.memo_ttl:
+            return None
+        return entry[1]
+
+    async def put(self, url: str, extra: DetailRecord) -> None:
+        self._memo.put(url, (time.time(), extra))
+        if self.settings.memo_path:
+            await asyncio.to_thread(self._store, url, extra)
+
+    @asynccontextmanager
+    async def claim(self, url: str) -> AsyncIterator[DetailRecord | None]:
+        """Claims ``url`` for this process while the caller fetches it.
+
+        Yields None when the caller should fetch the page, or the record
+        another process stored while this one waited for the claim.
+        """
+        if not self.settings.memo_path:
+            yield None
+            return
+        waited = False
+        while not await asyncio.to_thread(self._claim, url):
+            waited = True
+            await asyncio.sleep(self.settings.memo_claim_poll)
+        try:
+            # the other process stores the record before it releases its claim
+            entry = await asyncio.to_thread(self._load, url) if waited else None
+            if entry is not None:
+                self._memo.put(url, entry)
+            yield entry[1] if entry is not None else None
+        finally:
+            await asyncio.to_thread(self._release, url)
+
+    async def deduplicate(self, url: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.create_task(fetch())
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        # a cancelled waiter must not cancel the fetch other jobs are waiting for
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        self._memo.clear()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,206 @@
+import asyncio
+import bisect
+import json
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from typing import Any
+
+from src.settings import Settings
+
+Labels = tuple[tuple[str, str], ...]
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf"))
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0,
+            "max": self.max,
+        }
+
+
+class RequestTrace:
+    """Collects connection and transfer timings from httpcore trace events.
+
+    httpcore resolves DNS inside ``connect_tcp``, so DNS time is part of
+    ``connect``.
+    """
+
+    STAGES = {
+        "connect_tcp": "connect",
+        "start_tls": "tls",
+        "send_request_headers": "ttfb",
+        "send_request_body": "ttfb",
+        "receive_response_headers": "ttfb",
+        "receive_response_body": "body",
+    }
+
+    def __init__(self):
+        self.durations: dict[str, float] = defaultdict(float)
+        self._started: dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: dict[str, Any]) -> None:
+        name, _, state = event_name.rpartition(".")
+        stage = self.STAGES.get(name.rpartition(".")[2])
+        if stage is None:
+            return
+        if state == "started":
+            self._started[name] = time.perf_counter()
+        elif name in self._started:
+            self.durations[stage] += time.perf_counter() - self._started.pop(name)
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{escape_label(value)}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+
+class Metrics:
+    """Counters and histograms of everything the crawler does.
+
+    Nothing is recorded while ``metrics`` is disabled, so the calls on the
+    request path cost a single attribute check. Recorded data can be read
+    through hooks (called with every request record), a Prometheus text
+    endpoint on ``metrics_port``, a Prometheus text file written to
+    ``metrics_file`` and a JSON summary written to ``metrics_summary_file``
+    (``-`` for stderr) when the run ends.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.counters: dict[tuple[str, Labels], float] = defaultdict(float)
+        self.histograms: dict[tuple[str, Labels], Histogram] = defaultdict(Histogram)
+        self.hooks: list[Callable[[dict[str, Any]], None]] = []
+        self._server: asyncio.Server | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.metrics
+
+    def add_hook(self, hook: Callable[[dict[str, Any]], None]) -> None:
+        self.hooks.append(hook)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        if self.enabled:
+            self.counters[name, tuple(sorted(labels.items()))] += value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        if self.enabled:
+            self.histograms[name, tuple(sorted(labels.items()))].observe(value)
+
+    def create_trace(self) -> RequestTrace | None:
+        return RequestTrace() if self.enabled else None
+
+    def record_request(
+        self,
+        proxy: str,
+        duration: float,
+        status_code: int | None = None,
+        num_bytes: int = 0,
+        trace: RequestTrace | None = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        status = str(status_code) if status_code is not None else "error"
+        self.inc("requests_total", proxy=proxy, status=status)
+        self.inc("bytes_received_total", num_bytes, proxy=proxy)
+        self.observe("request_seconds", duration, proxy=proxy)
+        durations = trace.durations if trace is not None else {}
+        for stage, stage_duration in durations.items():
+            self.observe("request_stage_seconds", stage_duration, stage=stage)
+        record = {
+            "proxy": proxy,
+            "status": status,
+            "duration": duration,
+            "bytes": num_bytes,
+            **durations,
+        }
+        for hook in self.hooks:
+            hook(record)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for (name, labels), value in sorted(self.counters.items()):
+            lines.append(f"crawler_{name}{format_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bucket, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                le = "+Inf" if bucket == float("inf") else str(bucket)
+                bucket_labels = format_labels((*labels, ("le", le)))
+                lines.append(f"crawler_{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"crawler_{name}_sum{format_labels(labels)} {histogram.sum}")
+            lines.append(
+                f"crawler_{name}_count{format_labels(labels)} {histogram.count}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict[str, Any]:
+        counters = defaultdict(dict)
+        for (name, labels), value in self.counters.items():
+            counters[name][format_labels(labels) or "total"] = value
+        histograms = defaultdict(dict)
+        for (name, labels), histogram in self.histograms.items():
+            histograms[name][format_labels(labels) or "total"] = histogram.summary()
+        return {"counters": counters, "histograms": histograms}
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        while (await reader.readline()).strip():
+            pass
+        body = self.to_prometheus().encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+            b"Content-Length: %d\r\nConnection: close\r\n\r\n" % len(body)
+        )
+        writer.write(body)
+        await writer.drain()
+        writer.close()
+
+    async def start_server(self) -> None:
+        if self.enabled and self.settings.metrics_port and self._server is None:
+            self._server = await asyncio.start_server(
+                self._handle, "127.0.0.1", self.settings.metrics_port
+            )
+
+    async def aclose(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if not self.enabled:
+            return
+        if self.settings.metrics_file:
+            with open(self.settings.metrics_file, "w", encoding="utf-8") as file:
+                file.write(self.to_prometheus())
+        if self.settings.metrics_summary_file == "-":
+            print(json.dumps(self.summary(), indent=4), file=sys.stderr)
+        elif self.settings.metrics_summary_file:
+            with open(
+                self.settings.metrics_summary_file, "w", encoding="utf-8"
+            ) as file:
+                json.dump(self.summary(), file, indent=4)
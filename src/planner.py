@@ -0,0 +1,42 @@
+from src.settings import Settings
+
+OPERATORS = {"AND", "OR", "NOT"}
+
+
+def count_operators(keywords: list[str]) -> int:
+    """Counts the operators of the query the keywords are OR-joined into."""
+    inner = sum(word in OPERATORS for keyword in keywords for word in keyword.split())
+    return inner + len(keywords) - 1
+
+
+def fits_query(keywords: list[str], settings: Settings) -> bool:
+    query = " OR ".join(keywords)
+    return (
+        len(query) <= settings.query_max_length
+        and count_operators(keywords) <= settings.query_max_operators
+    )
+
+
+def plan_queries(keywords: list[str], settings: Settings) -> list[str]:
+    """Turns the keywords of a job into the search queries that are run for it.
+
+    ``or`` joins every keyword into one query, ``split`` runs one query per
+    keyword for the best coverage. ``auto`` packs keywords into as few
+    OR-queries as stay within ``query_max_length`` characters and
+    ``query_max_operators`` operators, GitHub's limits of a search query, so a
+    few short keywords still make a single query.
+    """
+    keywords = list(dict.fromkeys(keyword.strip() for keyword in keywords))
+    keywords = [keyword for keyword in keywords if keyword]
+    if len(keywords) <= 1 or settings.query_strategy == "or":
+        return [" OR ".join(keywords)]
+    if settings.query_strategy == "split":
+        return keywords
+
+    shards: list[list[str]] = []
+    for keyword in keywords:
+        if shards and fits_query([*shards[-1], keyword], settings):
+            shards[-1].append(keyword)
+        else:
+            shards.append([keyword])
+    return [" OR ".join(shard) for shard in shards]
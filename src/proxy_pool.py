@@ -0,0 +1,76 @@
+import random
+import time
+from dataclasses import dataclass
+
+from src.settings import Settings
+
+
+@dataclass
+class ProxyStats:
+    proxy: str
+    success_rate: float = 1.0
+    latency: float = 1.0
+    failures: int = 0
+    quarantined_until: float = 0
+
+    @property
+    def is_quarantined(self) -> bool:
+        return self.quarantined_until > time.monotonic()
+
+    @property
+    def weight(self) -> float:
+        # fast, healthy proxies are picked more often, but never starved completely
+        return max(self.success_rate, 0.01) / max(self.latency, 0.001)
+
+
+class ProxyPool:
+    """Picks proxies by their health and keeps track of how they perform.
+
+    Success rate and latency of every proxy are exponentially weighted moving
+    averages (``proxy_ewma_alpha``), and the chance of a proxy being selected
+    is proportional to ``success_rate / latency``. A failing proxy is put in
+    quarantine for ``proxy_quarantine`` seconds, doubled for every consecutive
+    failure up to ``proxy_max_quarantine``.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.stats: dict[str, ProxyStats] = {}
+
+    def get_stats(self, proxy: str) -> ProxyStats:
+        stats = self.stats.get(proxy)
+        if stats is None:
+            stats = self.stats[proxy] = ProxyStats(proxy)
+        return stats
+
+    def select(self, proxy_list: list[str], exclude: set[str] = frozenset()) -> str:
+        candidates = [
+            self.get_stats(proxy) for proxy in proxy_list if proxy not in exclude
+        ]
+        if not candidates:
+            candidates = [self.get_stats(proxy) for proxy in proxy_list]
+        healthy = [stats for stats in candidates if not stats.is_quarantined]
+        if not healthy:
+            # every proxy is in quarantine, use the one that gets out of it first
+            return min(candidates, key=lambda stats: stats.quarantined_until).proxy
+        weights = [stats.weight for stats in healthy]
+        return random.choices(healthy, weights=weights)[0].proxy
+
+    def record_success(self, proxy: str, latency: float) -> None:
+        alpha = self.settings.proxy_ewma_alpha
+        stats = self.get_stats(proxy)
+        stats.success_rate += alpha * (1 - stats.success_rate)
+        stats.latency += alpha * (latency - stats.latency)
+        stats.failures = 0
+        stats.quarantined_until = 0
+
+    def record_failure(self, proxy: str) -> None:
+        alpha = self.settings.proxy_ewma_alpha
+        stats = self.get_stats(proxy)
+        stats.success_rate -= alpha * stats.success_rate
+        stats.failures += 1
+        backoff = min(
+            self.settings.proxy_quarantine * 2 ** (stats.failures - 1),
+            self.settings.proxy_max_quarantine,
+        )
+        stats.quarantined_until = time.monotonic() + backoff
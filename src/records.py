@@ -0,0 +1,126 @@
+import json
+import sys
+from dataclasses import dataclass, field
+from json.encoder import encode_basestring as quote
+from typing import Any
+
+from pydantic import BaseModel
+
+from src.schema import (
+    BatchResultSchema,
+    Extra,
+    SearchDataSchema,
+    SearchResultSchema,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class DetailRecord:
+    owner: str
+    language_stats: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def create(cls, owner: str, language_stats: dict[str, float]) -> "DetailRecord":
+        # a few dozen owner and language names repeat over thousands of results;
+        # str() also drops lxml string results, which keep their document alive
+        return cls(
+            sys.intern(str(owner)),
+            {sys.intern(str(name)): value for name, value in language_stats.items()},
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"owner": self.owner, "language_stats": self.language_stats}
+
+    def to_json(self) -> str:
+        stats = ",".join(
+            [f"{quote(name)}:{value!r}" for name, value in self.language_stats.items()]
+        )
+        return f'{{"owner":{quote(self.owner)},"language_stats":{{{stats}}}}}'
+
+    def to_schema(self) -> Extra:
+        return Extra.model_construct(
+            owner=self.owner, language_stats=self.language_stats
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ResultRecord:
+    url: str
+    extra: DetailRecord | None = None
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "url": self.url,
+            "extra": self.extra.to_dict() if self.extra is not None else None,
+            "error": self.error,
+        }
+
+    def to_json(self) -> str:
+        extra = self.extra.to_json() if self.extra is not None else "null"
+        error = quote(self.error) if self.error is not None else "null"
+        return f'{{"url":{quote(self.url)},"extra":{extra},"error":{error}}}'
+
+    def to_schema(self) -> SearchDataSchema:
+        return SearchDataSchema.model_construct(
+            url=self.url,
+            extra=self.extra.to_schema() if self.extra is not None else None,
+            error=self.error,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class BatchRecord:
+    line: int
+    results: list[ResultRecord] = field(default_factory=list)
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "line": self.line,
+            "results": [result.to_dict() for result in self.results],
+            "error": self.error,
+        }
+
+    def to_json(self) -> str:
+        results = ",".join([result.to_json() for result in self.results])
+        error = quote(self.error) if self.error is not None else "null"
+        return f'{{"line":{self.line},"results":[{results}],"error":{error}}}'
+
+    def to_schema(self) -> BatchResultSchema:
+        return BatchResultSchema.model_construct(
+            line=self.line,
+            results=[result.to_schema() for result in self.results],
+            error=self.error,
+        )
+
+
+Record = DetailRecord | ResultRecord | BatchRecord
+
+
+def to_search_result(records: list[ResultRecord]) -> SearchResultSchema:
+    """Wraps records we produced ourselves in the public schema without validating them."""
+    return SearchResultSchema.model_construct(
+        [record.to_schema() for record in records]
+    )
+
+
+def dumps(item: Record | BaseModel, indent: int | None = None) -> str:
+    """Serializes a record or a pydantic model like ``model_dump_json`` does.
+
+    Compact records are formatted directly, which skips building
+    intermediate dicts and the pydantic model of every result.
+    """
+    if isinstance(item, BaseModel):
+        return item.model_dump_json(indent=indent)
+    if indent is None:
+        return item.to_json()
+    return json.dumps(item.to_dict(), indent=indent, ensure_ascii=False)
+
+
+def dumps_list(items: list[Record], indent: int | None = None) -> str:
+    if indent is None:
+        return "[" + ",".join([item.to_json() for item in items]) + "]"
+    return json.dumps(
+        [item.to_dict() for item in items], indent=indent, ensure_ascii=False
+    )
@@ -0,0 +1,87 @@
+import asyncio
+import random
+import statistics
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from src.settings import Settings
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RetryBudget:
+    """Token bucket that limits retries to ``retry_budget_ratio`` of all requests.
+
+    Every request adds ``retry_budget_ratio`` of a token and every retry takes
+    a whole one. The bucket starts with ``retry_budget_min`` tokens, so a short
+    run can retry too, and holds at most ``retry_budget_max``, so retries saved
+    up over hours of healthy traffic can not all be spent in one outage.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.tokens = float(min(settings.retry_budget_min, settings.retry_budget_max))
+
+    def record_request(self) -> None:
+        self.tokens = min(
+            self.tokens + self.settings.retry_budget_ratio,
+            self.settings.retry_budget_max,
+        )
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class LatencyTracker:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.latencies: deque[float] = deque(maxlen=settings.hedge_window)
+
+    def add(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    def get_hedge_delay(self) -> float | None:
+        """Returns the observed p95 latency, once there are enough samples."""
+        if len(self.latencies) < self.settings.hedge_min_samples:
+            return None
+        return statistics.quantiles(self.latencies, n=20, method="inclusive")[18]
+
+
+def get_backoff(attempt: int, settings: Settings) -> float:
+    # "full jitter": spreads retries of concurrent requests over the whole interval
+    ceiling = min(settings.retry_max_backoff, settings.retry_backoff * 2**attempt)
+    return random.uniform(0, ceiling)
+
+
+async def first_successful(
+    fetch: Callable[[], Awaitable[Any]], hedge_delay: float | None
+) -> Any:
+    """Runs ``fetch`` and, if it is slower than ``hedge_delay``, a duplicate of it.
+
+    The first successful result wins and the other attempt is cancelled. An
+    error is raised only when every attempt failed.
+    """
+    tasks = {asyncio.create_task(fetch())}
+    try:
+        if hedge_delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done:
+                tasks.add(asyncio.create_task(fetch()))
+        error = None
+        pending = tasks
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
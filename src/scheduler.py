@@ -0,0 +1,109 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
+
+from src.settings import Settings
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second with bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+@dataclass
+class QueueWaitStats:
+    count: int = 0
+    total: float = 0
+    max: float = 0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0
+
+    def add(self, wait: float) -> None:
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+
+
+class FetchScheduler:
+    """Runs fetches with bounded concurrency and a per-host rate limit.
+
+    At most ``max_concurrency`` fetches are in flight, a token bucket per host
+    limits the request rate, and once ``queue_size`` more fetches are waiting
+    for a slot ``submit`` blocks, which pushes back on producers.
+    The time every fetch spends waiting for a slot and a host token is
+    collected in ``wait_stats`` and passed to ``on_wait``.
+    """
+
+    def __init__(
+        self, settings: Settings, on_wait: Callable[[float], None] | None = None
+    ):
+        self.settings = settings
+        self.wait_stats = QueueWaitStats()
+        self.on_wait = on_wait
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue_slots: asyncio.Semaphore | None = None
+        self._fetch_slots: asyncio.Semaphore | None = None
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # asyncio primitives are bound to the loop they are used in
+            self._loop = loop
+            self._queue_slots = asyncio.Semaphore(
+                self.settings.queue_size + self.settings.max_concurrency
+            )
+            self._fetch_slots = asyncio.Semaphore(self.settings.max_concurrency)
+            self._buckets = {}
+
+    def get_bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(
+                self.settings.host_rate_limit, self.settings.host_burst
+            )
+            self._buckets[host] = bucket
+        return bucket
+
+    async def submit(self, url: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        self._start()
+        async with self._queue_slots:
+            queued_at = time.monotonic()
+            # the host token comes first, so a rate limited host does not hold
+            # the slots that requests to other hosts are waiting for
+            await self.get_bucket(url).acquire()
+            async with self._fetch_slots:
+                wait = time.monotonic() - queued_at
+                self.wait_stats.add(wait)
+                if self.on_wait is not None:
+                    self.on_wait(wait)
+                return await fetch()
@@ -1,16 +1,20 @@
 from typing import Literal
 
-from pydantic import BaseModel, RootModel
+from pydantic import BaseModel, PositiveInt, RootModel
 
 
 class SearchSchema(BaseModel):
     keywords: list[str]
     proxies: list[str] | None = None
     type: Literal["Repositories", "Issues", "Wikis"]
+    # fetch every repository page for its owner and languages
+    extra: bool = True
+    max_pages: PositiveInt = 1
+    max_results: PositiveInt | None = None
 
-    def get_query_params(self) -> dict[str, str]:
+    def get_query_params(self, query: str | None = None) -> dict[str, str]:
         return {
-            "q": " OR ".join(self.keywords),
+            "q": " OR ".join(self.keywords) if query is None else query,
             "type": self.type.lower(),
         }
 
@@ -22,8 +26,21 @@ class Extra(BaseModel):
 
 class SearchDataSchema(BaseModel):
     url: str
-    extra: Extra
+    extra: Extra | None = None
+    error: str | None = None
 
 
 class SearchResultSchema(RootModel[list[SearchDataSchema]]):
     pass
+
+
+class BatchResultSchema(BaseModel):
+    line: int
+    results: list[SearchDataSchema] = []
+    error: str | None = None
+
+
+class JobResultSchema(BaseModel):
+    job: int
+    results: list[SearchDataSchema] = []
+    error: str | None = None
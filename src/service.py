@@ -0,0 +1,220 @@
+import asyncio
+import json
+import signal
+from contextlib import aclosing, suppress
+from urllib.parse import parse_qs, urlsplit
+
+from pydantic import ValidationError
+
+from src import main
+from src.records import dumps_list
+from src.schema import SearchSchema
+from src.settings import Settings
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Content Too Large",
+    502: "Bad Gateway",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Request:
+    def __init__(self, method: str, target: str, body: bytes):
+        self.method = method
+        url = urlsplit(target)
+        self.path = url.path
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.body = body
+
+    @property
+    def stream(self) -> bool:
+        return self.query.get("stream", "0").lower() in ("1", "true", "yes")
+
+
+class SearchService:
+    """Runs search jobs sent to a local HTTP API on warm, shared resources.
+
+    ``POST /search`` takes a ``SearchSchema`` JSON body and answers with the
+    JSON list of its results, or with ``?stream=1`` an NDJSON line per result
+    as soon as it is parsed. ``GET /health`` reports the running jobs. HTTP
+    clients, proxy statistics, the detail memo, the response cache and parse
+    workers stay open between jobs, and at most ``service_concurrency`` jobs
+    run at once. The API listens on ``service_socket`` when it is set,
+    otherwise on ``service_host``:``service_port``.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.jobs = 0
+        self._slots = asyncio.Semaphore(settings.service_concurrency)
+        self._server: asyncio.Server | None = None
+        self._connections: set[asyncio.Task] = set()
+        self._stopped = asyncio.Event()
+
+    @property
+    def address(self) -> str:
+        if self.settings.service_socket:
+            return self.settings.service_socket
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def start(self) -> None:
+        await main.open_resources()
+        if self.settings.service_socket:
+            self._server = await asyncio.start_unix_server(
+                self._handle,
+                self.settings.service_socket,
+                limit=self.settings.service_max_request_size,
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle,
+                self.settings.service_host,
+                self.settings.service_port,
+                limit=self.settings.service_max_request_size,
+            )
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    async def run(self) -> None:
+        """Serves jobs until SIGINT/SIGTERM or ``stop()``, then shuts down."""
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stop)
+        await self.start()
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # running jobs still need the HTTP clients, so let them finish first
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await main.close_resources()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            try:
+                request = await self._read_request(reader)
+                await self._dispatch(request, writer)
+            except HTTPError as exc:
+                self._write_json(writer, exc.status_code, {"error": str(exc)})
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # the client went away, a streamed job is cancelled with the generator
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Request:
+        try:
+            method, target, _ = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while line := (await reader.readline()).strip():
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except (ValueError, asyncio.LimitOverrunError) as exc:
+            raise HTTPError(400, "malformed request") from exc
+        body = b""
+        if method == "POST":
+            if not headers.get("content-length", "").isdigit():
+                raise HTTPError(411, "Content-Length is required")
+            length = int(headers["content-length"])
+            if length > self.settings.service_max_request_size:
+                raise HTTPError(413, "request body is too large")
+            body = await reader.readexactly(length)
+        return Request(method, target, body)
+
+    async def _dispatch(self, request: Request, writer: asyncio.StreamWriter) -> None:
+        if request.path == "/health":
+            if request.method != "GET":
+                raise HTTPError(405, "use GET")
+            self._write_json(writer, 200, {"status": "ok", "jobs": self.jobs})
+        elif request.path == "/search":
+            if request.method != "POST":
+                raise HTTPError(405, "use POST")
+            try:
+                scraping_data = SearchSchema.model_validate_json(request.body)
+            except ValidationError as exc:
+                raise HTTPError(400, str(exc)) from exc
+            async with self._slots:
+                self.jobs += 1
+                try:
+                    if request.stream:
+                        await self._stream_search(scraping_data, writer)
+                    else:
+                        await self._search(scraping_data, writer)
+                finally:
+                    self.jobs -= 1
+        else:
+            raise HTTPError(404, f"no such path: {request.path}")
+
+    async def _search(
+        self, scraping_data: SearchSchema, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            results = await main.search_records(scraping_data)
+        except Exception as exc:
+            raise HTTPError(502, f"{type(exc).__name__}: {exc}") from exc
+        body = dumps_list(results).encode()
+        self._write_head(writer, 200, "application/json", len(body))
+        writer.write(body)
+
+    async def _stream_search(
+        self, scraping_data: SearchSchema, writer: asyncio.StreamWriter
+    ) -> None:
+        # without Content-Length the end of the stream is the end of the connection
+        self._write_head(writer, 200, "application/x-ndjson")
+        try:
+            async with aclosing(main.iter_search(scraping_data)) as results:
+                async for item in results:
+                    writer.write(item.to_json().encode() + b"\n")
+                    await writer.drain()
+        except ConnectionError:
+            raise
+        except Exception as exc:
+            # the status line is already sent, so a failed job ends with an error line
+            error = json.dumps({"error": f"{type(exc).__name__}: {exc}"})
+            writer.write(error.encode() + b"\n")
+
+    def _write_head(
+        self,
+        writer: asyncio.StreamWriter,
+        status_code: int,
+        content_type: str,
+        content_length: int | None = None,
+    ) -> None:
+        head = f"HTTP/1.1 {status_code} {REASONS[status_code]}\r\n"
+        head += f"Content-Type: {content_type}\r\n"
+        if content_length is not None:
+            head += f"Content-Length: {content_length}\r\n"
+        writer.write(head.encode() + b"Connection: close\r\n\r\n")
+
+    def _write_json(
+        self, writer: asyncio.StreamWriter, status_code: int, content: dict
+    ) -> None:
+        body = json.dumps(content).encode()
+        self._write_head(writer, status_code, "application/json", len(body))
+        writer.write(body)
@@ -1,5 +1,97 @@
+from typing import Literal
+
+from pydantic import PositiveInt
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     base_url: str = "https://github.com"
+    request_timeout: float = 10
+
+    # connection pool of the shared HTTP clients
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30
+    http2: bool = False
+
+    # fetch scheduler: requests in flight, waiting fetches and per-host rate
+    max_concurrency: int = 10
+    queue_size: int = 100
+    host_rate_limit: float = 10
+    host_burst: int = 10
+
+    # how keywords become search queries: "auto" packs them into as few
+    # OR-queries as fit GitHub's limits, "or" makes one, "split" one per keyword
+    query_strategy: Literal["auto", "or", "split"] = "auto"
+    query_max_length: int = 256
+    query_max_operators: int = 5
+
+    # batch mode: jobs processed at the same time
+    batch_concurrency: int = 10
+
+    # worker mode: processes taking jobs from a shared queue, a job whose
+    # worker died is leased again once its lease runs out
+    queue_backend: Literal["sqlite"] = "sqlite"
+    queue_path: str = "queue.sqlite3"
+    queue_lease: float = 60
+    queue_max_attempts: int = 3
+    queue_poll_interval: float = 1
+    worker_concurrency: int = 10
+
+    # service mode: local job API on a TCP port, or on a Unix socket when set
+    service_host: str = "127.0.0.1"
+    service_port: int = 8080
+    service_socket: str | None = None
+    service_concurrency: int = 10
+    service_max_request_size: int = 1024 * 1024
+
+    # on-disk HTTP response cache, disabled while cache_dir is not set
+    cache_dir: str | None = None
+    cache_ttl: float = 3600
+    cache_stale_while_revalidate: float = 0
+    cache_max_age: float = 7 * 24 * 3600
+    cache_max_size: int = 256 * 1024 * 1024
+
+    # parsed detail pages shared between jobs, memo_path keeps them between runs
+    memo_size: int = 10_000
+    memo_path: str | None = None
+    memo_ttl: float = 24 * 3600
+    memo_claim_ttl: float = 120
+    memo_claim_poll: float = 0.5
+
+    # "pool" spreads requests over healthy proxies, "random" uses one per job
+    proxy_mode: Literal["pool", "random"] = "pool"
+    proxy_failover_attempts: PositiveInt = 3
+    proxy_ewma_alpha: float = 0.3
+    proxy_quarantine: float = 5
+    proxy_max_quarantine: float = 300
+
+    # where HTML is parsed: "inline" on the event loop, "thread" or "process" pool
+    parse_executor: Literal["inline", "thread", "process"] = "inline"
+    parse_workers: int | None = None
+
+    # "lxml" parses only the page regions the owner and languages are taken from
+    extractor: Literal["selector", "lxml"] = "selector"
+
+    # instrumentation, nothing is recorded while metrics is disabled
+    metrics: bool = False
+    metrics_port: int | None = None
+    metrics_file: str | None = None
+    metrics_summary_file: str | None = None
+
+    # retries and hedged requests
+    request_deadline: float = 30
+    max_retries: int = 2
+    retry_backoff: float = 0.5
+    retry_max_backoff: float = 10
+    retry_budget_ratio: float = 0.2
+    retry_budget_min: int = 10
+    retry_budget_max: int = 20
+    hedging: bool = False
+    hedge_min_samples: int = 20
+    hedge_window: int = 200
+
+    # response bodies: size limit, and whether to stop reading a repository page
+    # once the owner and languages were received (closes the connection)
+    max_body_size: int = 5 * 1024 * 1024
+    stop_reading_early: bool = False
@@ -0,0 +1,52 @@
+from urllib.parse import urljoin, urlsplit
+
+from src.records import DetailRecord, ResultRecord
+from src.schema import SearchSchema
+
+
+class SearchStrategy:
+    """Decides what is extracted for the links of a search results page.
+
+    Strategies with ``fetch_details`` need the detail page of every result,
+    the others build the results from the search page alone.
+    """
+
+    fetch_details = False
+
+    def get_extra(self, link: str) -> DetailRecord | None:
+        return None
+
+    def parse_results(self, links: list[str], base_url: str) -> list[ResultRecord]:
+        return [
+            ResultRecord(urljoin(base_url, link), self.get_extra(link))
+            for link in links
+        ]
+
+
+class RepositoryStrategy(SearchStrategy):
+    fetch_details = True
+
+
+class UrlOnlyStrategy(SearchStrategy):
+    pass
+
+
+class OwnerFromUrlStrategy(SearchStrategy):
+    """Issues and wiki pages have the repository owner as the first path segment."""
+
+    def get_extra(self, link: str) -> DetailRecord | None:
+        owner = urlsplit(link).path.strip("/").split("/")[0]
+        return DetailRecord.create(owner, {}) if owner else None
+
+
+REPOSITORY_STRATEGY = RepositoryStrategy()
+URL_ONLY_STRATEGY = UrlOnlyStrategy()
+OWNER_FROM_URL_STRATEGY = OwnerFromUrlStrategy()
+
+
+def get_search_strategy(scraping_data: SearchSchema) -> SearchStrategy:
+    if scraping_data.type != "Repositories":
+        return OWNER_FROM_URL_STRATEGY
+    if not scraping_data.extra:
+        return URL_ONLY_STRATEGY
+    return REPOSITORY_STRATEGY
@@ -0,0 +1,167 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+from contextlib import suppress
+from typing import TextIO
+
+from pydantic import ValidationError
+
+from src import main
+from src.jobqueue import Job, JobQueue, get_job_queue
+from src.records import dumps_list
+from src.schema import SearchSchema
+
+
+class Worker:
+    """Takes jobs from a shared queue and runs up to ``worker_concurrency`` of them.
+
+    Leases of running jobs are extended every third of ``queue_lease``, so
+    only the jobs of a worker that stopped responding are handed to another
+    one. Invalid jobs fail at once, jobs whose search failed are retried.
+    """
+
+    def __init__(self, queue: JobQueue, worker_id: str | None = None):
+        self.queue = queue
+        self.settings = queue.settings
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.running: dict[int, Job] = {}
+        self._stopped = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    async def run_job(self, job: Job) -> None:
+        try:
+            scraping_data = SearchSchema.model_validate_json(job.payload)
+        except ValidationError as exc:
+            error = f"ValidationError: {exc}"
+            await self.queue.fail(job, self.worker_id, error, retry=False)
+            return
+        try:
+            results = await main.search_records(scraping_data)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            await self.queue.fail(job, self.worker_id, error)
+            return
+        await self.queue.complete(job, self.worker_id, dumps_list(results))
+
+    async def keep_leases(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.queue_lease / 3)
+            if self.running:
+                await self.queue.extend(list(self.running.values()), self.worker_id)
+
+    async def has_pending_jobs(self) -> bool:
+        counts = await self.queue.count()
+        return counts.get("queued", 0) + counts.get("leased", 0) > 0
+
+    async def run(self, drain: bool = False) -> int:
+        """Runs jobs until ``stop()`` is called, with ``drain`` until no job is left.
+
+        Jobs leased by other workers count as left, as they are run again
+        should their worker die. Returns the number of jobs this worker ran.
+        """
+        slots = asyncio.Semaphore(self.settings.worker_concurrency)
+        tasks: set[asyncio.Task] = set()
+        jobs = 0
+
+        def finish(job: Job, task: asyncio.Task) -> None:
+            self.running.pop(job.id, None)
+            tasks.discard(task)
+            slots.release()
+
+        lease_keeper = asyncio.create_task(self.keep_leases())
+        try:
+            while not self._stopped.is_set():
+                await slots.acquire()
+                if self._stopped.is_set():
+                    slots.release()
+                    break
+                job = await self.queue.lease(self.worker_id)
+                if job is None:
+                    slots.release()
+                    if drain and not tasks and not await self.has_pending_jobs():
+                        break
+                    with suppress(TimeoutError):
+                        await asyncio.wait_for(
+                            self._stopped.wait(), self.settings.queue_poll_interval
+                        )
+                    continue
+                jobs += 1
+                self.running[job.id] = job
+                # every task runs in a copy of the context, so each job keeps its own proxy
+                task = asyncio.create_task(self.run_job(job))
+                tasks.add(task)
+                task.add_done_callback(lambda task, job=job: finish(job, task))
+            await asyncio.gather(*tasks)
+        finally:
+            lease_keeper.cancel()
+        return jobs
+
+
+async def run_worker(drain: bool = False) -> int:
+    queue = get_job_queue(main.settings)
+    worker = Worker(queue)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        # running jobs are finished, the others stay in the queue
+        loop.add_signal_handler(signum, worker.stop)
+    await main.open_resources()
+    try:
+        return await worker.run(drain)
+    finally:
+        await main.close_resources()
+        await queue.aclose()
+
+
+def start_worker(drain: bool = False) -> None:
+    asyncio.run(run_worker(drain))
+
+
+def run_workers(processes: int, drain: bool = False) -> None:
+    """Runs ``processes`` worker processes on this host and waits for them."""
+    workers = [
+        multiprocessing.Process(target=start_worker, args=(drain,))
+        for _ in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    # SIGTERM stops the workers gracefully, SIGINT reaches them from the terminal
+    signal.signal(
+        signal.SIGTERM, lambda *_: [process.terminate() for process in workers]
+    )
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for process in workers:
+        process.join()
+
+
+async def enqueue(input_file: TextIO) -> int:
+    """Adds every ``SearchSchema`` JSON line of ``input_file`` to the shared queue."""
+    queue = get_job_queue(main.settings)
+    jobs = 0
+    try:
+        while True:
+            lines = await asyncio.to_thread(input_file.readlines, 1024 * 1024)
+            if not lines:
+                break
+            payloads = [line.strip() for line in lines if line.strip()]
+            jobs += len(await queue.put(payloads))
+    finally:
+        await queue.aclose()
+    return jobs
+
+
+async def write_results(output_file: TextIO) -> int:
+    """Writes a ``JobResultSchema`` NDJSON line for every finished job of the queue."""
+    queue = get_job_queue(main.settings)
+    count = 0
+    try:
+        async for line in queue.iter_results():
+            output_file.write(line + "\n")
+            count += 1
+    finally:
+        await queue.aclose()
+    output_file.flush()
+    return count
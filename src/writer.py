@@ -0,0 +1,58 @@
+from abc import ABC, abstractmethod
+from typing import TextIO
+
+from pydantic import BaseModel
+
+from src.records import Record, dumps
+
+
+class ResultWriter(ABC):
+    """Writes results to a text file one item at a time."""
+
+    def __init__(self, file: TextIO):
+        self.file = file
+
+    @abstractmethod
+    def write(self, item: Record | BaseModel) -> None:
+        pass
+
+    def close(self) -> None:
+        self.file.flush()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class NDJSONWriter(ResultWriter):
+    def write(self, item: Record | BaseModel) -> None:
+        self.file.write(dumps(item) + "\n")
+        self.file.flush()
+
+
+class JSONWriter(ResultWriter):
+    """Writes items as elements of a JSON array without holding the array in memory."""
+
+    def __init__(self, file: TextIO, indent: int | None = None):
+        super().__init__(file)
+        self.indent = indent
+        self.count = 0
+
+    def write(self, item: Record | BaseModel) -> None:
+        self.file.write("[" if self.count == 0 else ",")
+        if self.indent is None:
+            self.file.write(dumps(item))
+        else:
+            padding = " " * self.indent
+            element = dumps(item, self.indent)
+            self.file.write("\n" + padding + element.replace("\n", "\n" + padding))
+        self.file.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if self.count == 0:
+            self.file.write("[")
+        self.file.write("\n]\n" if self.indent is not None and self.count else "]\n")
+        super().close()
@@ -1,9 +1,17 @@
 import pytest
 
+from src import main
+from src.records import DetailRecord, ResultRecord
 from src.schema import Extra, SearchDataSchema
 from tests.html import detail_page, search_page
 
 
+@pytest.fixture(autouse=True)
+def clear_detail_memo():
+    yield
+    main.detail_memo.clear()
+
+
 @pytest.fixture
 def mock_search_page_html():
     return search_page.html
@@ -52,6 +60,16 @@ def parsed_data():
     ]
 
 
+@pytest.fixture
+def parsed_records(parsed_data):
+    return [
+        ResultRecord(
+            item.url, DetailRecord.create(item.extra.owner, item.extra.language_stats)
+        )
+        for item in parsed_data
+    ]
+
+
 @pytest.fixture
 def mock_proxies():
     return [
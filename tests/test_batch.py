@@ -0,0 +1,68 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from src.batch import run_batch, run_job
+from src.main import shared_proxy
+from src.schema import BatchResultSchema
+
+
+@pytest.mark.asyncio
+async def test_run_job(monkeypatch, parsed_records):
+    async def mock_search_records(*args, **kwargs):
+        return parsed_records
+
+    monkeypatch.setattr("src.main.search_records", mock_search_records)
+
+    result = await run_job(1, '{"keywords": ["openstack"], "type": "Repositories"}')
+
+    assert result.line == 1
+    assert result.error is None
+    assert result.results == parsed_records
+
+
+@pytest.mark.asyncio
+async def test_run_job_with_invalid_input():
+    result = await run_job(3, '{"keywords": ["openstack"], "type": "Commits"}')
+
+    assert result.line == 3
+    assert result.results == []
+    assert result.error.startswith("ValidationError")
+
+
+@pytest.mark.asyncio
+async def test_run_batch(monkeypatch, parsed_data, parsed_records, mock_proxies):
+    used_proxies = {}
+
+    async def mock_search_records(scraping_data):
+        shared_proxy.set(scraping_data.proxies)
+        await asyncio.sleep(0)
+        used_proxies[scraping_data.keywords[0]] = shared_proxy.get()
+        return parsed_records
+
+    monkeypatch.setattr("src.main.search_records", mock_search_records)
+
+    jobs = [
+        {
+            "keywords": ["openstack"],
+            "type": "Repositories",
+            "proxies": mock_proxies[:1],
+        },
+        {"keywords": ["nova"], "type": "Repositories", "proxies": mock_proxies[1:2]},
+    ]
+    input_file = io.StringIO("\n".join(json.dumps(job) for job in jobs) + "\n\n")
+    output_file = io.StringIO()
+
+    processed = await run_batch(input_file, output_file)
+
+    records = [
+        BatchResultSchema.model_validate_json(line)
+        for line in output_file.getvalue().splitlines()
+    ]
+    assert processed == 2
+    assert sorted(record.line for record in records) == [1, 2]
+    assert all(record.results == parsed_data for record in records)
+    # every job keeps the proxy it was started with
+    assert used_proxies == {"openstack": mock_proxies[:1], "nova": mock_proxies[1:2]}
@@ -0,0 +1,44 @@
+import httpx
+import pytest
+
+from benchmarks.bench import get_percentiles
+from benchmarks.server import StandInServer
+from src import main
+from src.schema import SearchSchema
+
+
+@pytest.mark.asyncio
+async def test_search_against_stand_in_server(monkeypatch):
+    server = await StandInServer().start()
+    port = server.sockets[0].getsockname()[1]
+    monkeypatch.setattr(main.settings, "base_url", f"http://127.0.0.1:{port}")
+
+    try:
+        scraping_data = SearchSchema(keywords=["openstack"], type="Repositories")
+        results = await main.search(scraping_data)
+    finally:
+        await main.close_resources()
+        server.close()
+        await server.wait_closed()
+
+    assert len(results.root) == 10
+    assert results.root[0].url == f"http://127.0.0.1:{port}/openstack/openstack?v=1"
+    assert results.root[0].extra.owner == "openstack"
+
+
+@pytest.mark.asyncio
+async def test_stand_in_server_errors():
+    server = await StandInServer(error_rate=1).start()
+    port = server.sockets[0].getsockname()[1]
+
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"http://127.0.0.1:{port}/openstack/nova")
+    server.close()
+    await server.wait_closed()
+
+    assert response.status_code == 503
+
+
+def test_get_percentiles():
+    assert get_percentiles([]) == {"p50": 0, "p95": 0, "p99": 0}
+    assert get_percentiles([float(value) for value in range(1, 102)])["p50"] == 51
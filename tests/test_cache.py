@@ -0,0 +1,123 @@
+import time
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from src import main
+from src.cache import CacheEntry, ResponseCache
+from src.client import BODY_TRUNCATED
+from src.settings import Settings
+
+URL = "https://github.com/openstack/openstack"
+
+
+def make_response(status_code=200, text="page", **headers):
+    return httpx.Response(
+        status_code,
+        text=text,
+        headers=headers,
+        request=httpx.Request("GET", URL),
+    )
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    return ResponseCache(Settings(cache_dir=str(tmp_path), cache_ttl=60))
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache():
+    response_cache = ResponseCache(Settings(cache_dir=None))
+    response = make_response()
+
+    assert await response_cache.get(URL) is None
+    assert await response_cache.update(URL, response, None) is response
+
+
+@pytest.mark.asyncio
+async def test_cache_stores_responses(response_cache):
+    await response_cache.update(URL, make_response(ETag='"v1"'), None)
+
+    entry = await response_cache.get(URL)
+
+    assert entry.body == b"page"
+    assert entry.get_validators() == {"If-None-Match": '"v1"'}
+    assert response_cache.is_fresh(entry)
+    assert entry.to_response().text == "page"
+    assert str(entry.to_response().url) == URL
+    await response_cache.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cache_reuses_body_on_not_modified(response_cache):
+    await response_cache.update(
+        URL, make_response(**{"Last-Modified": "Mon, 01 Jul 2024 00:00:00 GMT"}), None
+    )
+    entry = await response_cache.get(URL)
+    entry.stored_at -= 120
+
+    response = await response_cache.update(URL, make_response(304, text=""), entry)
+
+    assert response.status_code == 200
+    assert response.text == "page"
+    assert response_cache.is_fresh(await response_cache.get(URL))
+    await response_cache.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cache_skips_truncated_bodies(response_cache):
+    response = make_response(ETag='"v1"')
+    response.extensions[BODY_TRUNCATED] = True
+
+    assert await response_cache.update(URL, response, None) is response
+    assert await response_cache.get(URL) is None
+    await response_cache.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used(tmp_path):
+    response_cache = ResponseCache(Settings(cache_dir=str(tmp_path), cache_max_size=10))
+
+    for index in range(3):
+        await response_cache.update(
+            f"{URL}/{index}", make_response(text=f"body{index}"), None
+        )
+        time.sleep(0.001)
+
+    assert await response_cache.get(f"{URL}/0") is None
+    assert (await response_cache.get(f"{URL}/2")).body == b"body2"
+    await response_cache.aclose()
+
+
+def test_stale_while_revalidate(tmp_path):
+    settings = Settings(
+        cache_dir=str(tmp_path), cache_ttl=60, cache_stale_while_revalidate=60
+    )
+    response_cache = ResponseCache(settings)
+    entry = CacheEntry.from_response(URL, make_response())
+
+    entry.stored_at = time.time() - 90
+    assert not response_cache.is_fresh(entry)
+    assert response_cache.can_serve_stale(entry)
+
+    entry.stored_at = time.time() - 150
+    assert not response_cache.can_serve_stale(entry)
+
+
+@pytest.mark.asyncio
+async def test_get_page_html_revalidates_stale_entry(monkeypatch, tmp_path):
+    response_cache = ResponseCache(Settings(cache_dir=str(tmp_path), cache_ttl=0))
+    monkeypatch.setattr(main, "response_cache", response_cache)
+    fetch_page = AsyncMock(return_value=make_response(ETag='"v1"'))
+    monkeypatch.setattr(main, "fetch_page", fetch_page)
+
+    first = await main.get_page_html(URL)
+
+    fetch_page.return_value = make_response(304, text="")
+    second = await main.get_page_html(URL)
+
+    assert first.text == second.text == "page"
+    assert fetch_page.await_args_list[0].args == (URL, {})
+    assert fetch_page.await_args_list[1].args == (URL, {"If-None-Match": '"v1"'})
+    await response_cache.aclose()
@@ -0,0 +1,118 @@
+import gzip
+
+import brotli
+import httpx
+import pytest
+import zstandard
+
+from src.client import (
+    ACCEPT_ENCODING,
+    ClientManager,
+    get_decoded_headers,
+    get_proxy_key,
+    read_body,
+)
+from src.extract import DetailSectionsCheck, extract_detail
+from src.settings import Settings
+
+
+def test_get_proxy_key(mock_shared_proxy):
+    assert get_proxy_key(None) == ()
+    assert get_proxy_key(mock_shared_proxy) == get_proxy_key(dict(mock_shared_proxy))
+
+
+@pytest.mark.asyncio
+async def test_client_is_reused_per_proxy(mock_shared_proxy):
+    manager = ClientManager(Settings())
+
+    direct_client = manager.get_client(None)
+    proxy_client = manager.get_client(mock_shared_proxy)
+
+    assert manager.get_client(None) is direct_client
+    assert manager.get_client(mock_shared_proxy) is proxy_client
+    assert direct_client is not proxy_client
+
+    await manager.aclose()
+
+    assert direct_client.is_closed
+    assert proxy_client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_client_is_recreated_after_close():
+    async with ClientManager(Settings()) as manager:
+        client = manager.get_client()
+    assert client.is_closed
+
+    new_client = manager.get_client()
+    assert new_client is not client
+    assert not new_client.is_closed
+    await manager.aclose()
+
+
+def test_client_limits():
+    settings = Settings(max_connections=5, max_keepalive_connections=2)
+    manager = ClientManager(settings)
+
+    assert manager.limits.max_connections == 5
+    assert manager.limits.max_keepalive_connections == 2
+
+
+def make_stream(body: bytes, **headers) -> httpx.Response:
+    chunks = [body[index : index + 1000] for index in range(0, len(body), 1000)]
+
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    return httpx.Response(200, headers=headers, content=stream())
+
+
+def test_accept_encoding():
+    assert ACCEPT_ENCODING.endswith("gzip, deflate")
+    assert "br" in ACCEPT_ENCODING.split(", ")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["identity", "gzip", "br", "zstd"])
+async def test_read_body_decodes(encoding, mock_detail_page_html):
+    body = mock_detail_page_html.encode()
+    compress = {
+        "identity": lambda data: data,
+        "gzip": gzip.compress,
+        "br": brotli.compress,
+        "zstd": zstandard.ZstdCompressor().compress,
+    }[encoding]
+
+    response = make_stream(compress(body), **{"Content-Encoding": encoding})
+
+    assert await read_body(response, max_size=len(body) * 2) == (body, False)
+
+
+@pytest.mark.asyncio
+async def test_read_body_is_capped():
+    response = make_stream(b"x" * 5000)
+
+    assert await read_body(response, max_size=1500) == (b"x" * 1500, True)
+    response = make_stream(b"x" * 1500)
+    assert await read_body(response, max_size=1500) == (b"x" * 1500, False)
+
+
+@pytest.mark.asyncio
+async def test_read_body_stops_when_complete(mock_detail_page_html):
+    body = mock_detail_page_html.encode()
+    response = make_stream(body)
+
+    result, truncated = await read_body(response, len(body), DetailSectionsCheck())
+
+    assert truncated
+    assert len(result) < len(body)
+    assert extract_detail(result) == ("openstack", {"Python": 100.0})
+
+
+def test_get_decoded_headers():
+    response = httpx.Response(
+        200, headers={"Content-Encoding": "gzip", "Content-Length": "10", "ETag": "v1"}
+    )
+
+    assert get_decoded_headers(response) == [("etag", "v1")]
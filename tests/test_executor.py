@@ -0,0 +1,31 @@
+import pytest
+
+from src.executor import ParseExecutor
+from src.main import parse_detail_body, parse_search_page
+from src.settings import Settings
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+async def test_parse_executor(
+    mode, mock_search_page_html, mock_detail_page_html, search_page_result
+):
+    executor = ParseExecutor(Settings(parse_executor=mode, parse_workers=1))
+
+    links = await executor.run(parse_search_page, mock_search_page_html.encode())
+    detail = await executor.run(
+        parse_detail_body,
+        "https://github.com/openstack/openstack",
+        mock_detail_page_html.encode(),
+    )
+    await executor.aclose()
+
+    assert links == search_page_result
+    assert detail.extra.owner == "openstack"
+    assert detail.extra.language_stats == {"Python": 100.0}
+
+
+@pytest.mark.asyncio
+async def test_parse_executor_aclose_without_pool():
+    executor = ParseExecutor(Settings(parse_executor="thread"))
+    await executor.aclose()
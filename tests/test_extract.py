@@ -0,0 +1,72 @@
+import pytest
+
+from src import main
+from src.extract import LANGUAGES_MARKER, extract_detail, find_region
+from src.main import Selector, parse_detail_body, parse_languages, xpath
+
+
+def test_extract_detail_matches_selector(mock_detail_page_html):
+    selector = Selector(mock_detail_page_html)
+
+    owner, languages = extract_detail(mock_detail_page_html.encode())
+
+    assert owner == selector.xpath(xpath.OWNER).get()
+    assert languages == parse_languages(selector)
+    assert (owner, languages) == ("openstack", {"Python": 100.0})
+
+
+def test_find_region(mock_detail_page_html):
+    body = mock_detail_page_html.encode()
+
+    region = find_region(body, LANGUAGES_MARKER, b"<div", b"</ul>")
+
+    assert region.startswith(b"<div")
+    assert region.endswith(b"</ul>")
+    assert len(region) < len(body) // 100
+    assert find_region(b"<html></html>", LANGUAGES_MARKER, b"<div", b"</ul>") is None
+
+
+def test_extract_detail_falls_back_to_whole_page():
+    page = (
+        b"<html><body><a>no author link</a>"
+        b'<div><h2>Language</h2><ul><li><a><span class="x">Go</span>'
+        b"<span>75.5%</span></a></li></ul></div></body></html>"
+    )
+
+    assert extract_detail(page) == ("", {"Go": 75.5})
+
+
+def test_find_region_skips_closed_tags():
+    body = b'<div><div class="icon"></div><h2>Languages</h2><ul></ul></div>'
+
+    region = find_region(body, LANGUAGES_MARKER, b"<div", b"</ul>")
+
+    assert region == b'<div><div class="icon"></div><h2>Languages</h2><ul></ul>'
+
+
+def test_extract_detail_with_nested_tags_matches_selector():
+    page = (
+        b'<html><body><a rel="author" href="/nova">nova</a>'
+        b'<div><div class="icon"></div><h2>Languages</h2><ul><li><a>'
+        b'<span class="x">Go</span><span>75.5%</span></a></li></ul></div>'
+        b"</body></html>"
+    )
+    selector = Selector(page.decode())
+
+    assert extract_detail(page) == ("nova", parse_languages(selector))
+    assert extract_detail(page) == ("nova", {"Go": 75.5})
+
+
+@pytest.mark.parametrize("page_body", ["text", "bytes"])
+def test_parse_detail_body_with_lxml_extractor(
+    monkeypatch, mock_detail_page_html, page_body
+):
+    monkeypatch.setattr(main.settings, "extractor", "lxml")
+    body = mock_detail_page_html
+    if page_body == "bytes":
+        body = body.encode()
+
+    result = parse_detail_body("https://github.com/openstack/openstack", body)
+
+    assert result.extra.owner == "openstack"
+    assert result.extra.language_stats == {"Python": 100.0}
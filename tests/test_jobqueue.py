@@ -0,0 +1,91 @@
+import pytest
+
+from src.jobqueue import JobQueue, SQLiteJobQueue, get_job_queue
+from src.schema import JobResultSchema
+from src.settings import Settings
+
+
+@pytest.fixture
+def settings(tmp_path):
+    return Settings(queue_path=str(tmp_path / "queue.sqlite3"), queue_max_attempts=2)
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_leased_once(settings):
+    queue = get_job_queue(settings)
+    assert isinstance(queue, SQLiteJobQueue)
+
+    assert await queue.put(["first", "second"]) == [1, 2]
+    first = await queue.lease("a")
+    second = await queue.lease("b")
+
+    assert (first.payload, second.payload) == ("first", "second")
+    assert await queue.lease("c") is None
+    assert await queue.count() == {"leased": 2}
+    await queue.aclose()
+
+
+@pytest.mark.asyncio
+async def test_results_are_stored(settings):
+    queue = SQLiteJobQueue(settings)
+    await queue.put(["first", "second", "third"])
+    first, second = await queue.lease("a"), await queue.lease("a")
+
+    await queue.complete(first, "a", '[{"url":"https://github.com/a/b"}]')
+    await queue.fail(second, "a", "ValidationError: bad input", retry=False)
+
+    records = [
+        JobResultSchema.model_validate_json(line) async for line in queue.iter_results()
+    ]
+    assert [record.job for record in records] == [1, 2]
+    assert records[0].results[0].url == "https://github.com/a/b"
+    assert records[1].error == "ValidationError: bad input"
+    assert await queue.count() == {"done": 1, "failed": 1, "queued": 1}
+    await queue.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_are_retried(settings):
+    queue = SQLiteJobQueue(settings)
+    await queue.put(["job"])
+
+    await queue.fail(await queue.lease("a"), "a", "ConnectError: no route")
+    job = await queue.lease("b")
+    await queue.fail(job, "b", "ConnectError: no route")
+
+    assert job.attempts == 2
+    assert await queue.lease("c") is None
+    assert await queue.count() == {"failed": 1}
+    await queue.aclose()
+
+
+@pytest.mark.asyncio
+async def test_job_of_dead_worker_is_leased_again(settings, monkeypatch):
+    queue = SQLiteJobQueue(settings)
+    await queue.put(["job"])
+    lost = await queue.lease("dead")
+
+    now = 1e12
+    monkeypatch.setattr("src.jobqueue.time.time", lambda: now)
+    job = await queue.lease("alive")
+    # the dead worker comes back, but the job belongs to the new lease now
+    await queue.complete(lost, "dead", "[]")
+    await queue.extend([job], "alive")
+
+    assert (job.id, job.attempts) == (lost.id, 2)
+    assert await queue.count() == {"leased": 1}
+
+    now += settings.queue_lease + 1
+    assert await queue.lease("other") is None
+    assert await queue.count() == {"failed": 1}
+    assert "lease expired 2 times" in await anext(queue.iter_results())
+    await queue.aclose()
+
+
+def test_incomplete_backend_fails_when_created(settings):
+    class IncompleteQueue(JobQueue):
+        async def put(self, payloads):
+            return []
+
+    with pytest.raises(TypeError):
+        IncompleteQueue(settings)
@@ -1,7 +1,10 @@
+import asyncio
+import io
 from unittest.mock import AsyncMock
 
 import pytest
 from httpx import Request
+from pydantic import ValidationError
 
 from src import main
 from src.main import (
@@ -11,14 +14,24 @@ from src.main import (
     get_headers,
     get_page_html,
     get_search_results,
+    get_user_agent,
     httpx,
+    iter_search_details,
     parse_languages,
     parse_search_details,
     parse_search_page,
     select_random_proxy,
+    set_job_proxies,
     shared_proxy,
+    shared_proxy_list,
+    write_search_results,
 )
-from src.schema import SearchSchema
+from src.proxy_pool import ProxyPool
+from src.retry import RetryBudget
+from src.schema import SearchDataSchema, SearchSchema
+from src.settings import Settings
+from src.strategies import URL_ONLY_STRATEGY
+from src.writer import NDJSONWriter
 
 
 def test_get_headers():
@@ -26,6 +39,8 @@ def test_get_headers():
     assert "User-Agent" in headers
     assert "Accept" in headers
     assert headers["Accept"] == "text/html"
+    # the user agent data is loaded once, not for every request
+    assert get_user_agent() is get_user_agent()
 
 
 @pytest.mark.asyncio
@@ -33,10 +48,11 @@ async def test_get_page_html(monkeypatch):
     # Mock proxies
     shared_proxy.set(None)
 
-    async def mock_get(*args, **kwargs):
-        return httpx.Response(200, text="Mocked page HTML")
+    async def mock_send(request, *args, **kwargs):
+        return httpx.Response(200, text="Mocked page HTML", request=request)
 
-    monkeypatch.setattr("httpx.AsyncClient.get", AsyncMock(side_effect=mock_get))
+    # pages are read as streams, which go through AsyncClient.send
+    monkeypatch.setattr("httpx.AsyncClient.send", AsyncMock(side_effect=mock_send))
 
     response = await get_page_html("https://example.com")
 
@@ -119,11 +135,13 @@ async def test_collect_data(monkeypatch, search_page_result, mock_detail_page_ht
 
 
 @pytest.mark.asyncio
-async def test_get_search_results_with_mocked_collect_data(monkeypatch, parsed_data):
-    async def mock_collect_data(*args, **kwargs):
-        return SearchResultSchema(root=parsed_data)
+async def test_get_search_results_with_mocked_collect_records(
+    monkeypatch, parsed_data, parsed_records
+):
+    async def mock_collect_records(*args, **kwargs):
+        return parsed_records
 
-    monkeypatch.setattr("src.main.collect_data", mock_collect_data)
+    monkeypatch.setattr("src.main.collect_records", mock_collect_records)
 
     scraping_data = SearchSchema(keywords=["test"], type="Repositories", proxies=[])
     result = await get_search_results(scraping_data)
@@ -138,6 +156,7 @@ async def test_get_search_results_with_mocked_collect_data(monkeypatch, parsed_d
         result, SearchResultSchema
     ), "The result should be an instance of SearchResultSchema."
     assert len(result.root) == 2, "The number of results is incorrect."
+    assert result.root == parsed_data
 
 
 def test_select_proxy(mock_proxies, mock_shared_proxy):
@@ -180,3 +199,352 @@ def test_select_random_proxy(mock_proxies):
 def test_select_random_proxy_on_empty_list():
     result = select_random_proxy([])
     assert result is None, "Random proxy selection should return None on an empty list"
+
+
+@pytest.mark.asyncio
+async def test_iter_search_details_yields_as_completed(
+    monkeypatch, mock_detail_page_html
+):
+    async def mock_get_page_html(url):
+        # the first page is the slowest one
+        await asyncio.sleep(0.02 if url.endswith("/slow") else 0)
+        request = Request(method="GET", url=url)
+        return httpx.Response(200, text=mock_detail_page_html, request=request)
+
+    monkeypatch.setattr("src.main.get_page_html", mock_get_page_html)
+
+    results = [
+        item
+        async for item in iter_search_details(["/openstack/slow", "/openstack/fast"])
+    ]
+
+    assert [item.url for item in results] == [
+        "https://github.com/openstack/fast",
+        "https://github.com/openstack/slow",
+    ]
+    assert results[0].extra.owner == "openstack"
+
+
+@pytest.mark.asyncio
+async def test_iter_collect_data_cancels_details_when_closed(monkeypatch):
+    fetched = []
+
+    async def mock_iter_unique_links(*args):
+        yield ["/openstack/fast", "/openstack/slow"]
+
+    cancelled = []
+
+    async def mock_fetch_search_detail(url):
+        try:
+            await asyncio.sleep(0 if url.endswith("/fast") else 0.05)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+        fetched.append(url)
+        return main.ResultRecord(url)
+
+    monkeypatch.setattr(main, "iter_unique_links", mock_iter_unique_links)
+    monkeypatch.setattr(main, "fetch_search_detail", mock_fetch_search_detail)
+
+    results = main.iter_collect_data("https://github.com/search?q=a")
+    assert (await anext(results)).url == "/openstack/fast"
+    await results.aclose()
+    await asyncio.sleep(0)
+
+    assert cancelled == ["/openstack/slow"]
+    assert fetched == ["/openstack/fast"]
+
+
+@pytest.mark.asyncio
+async def test_write_search_results(monkeypatch, parsed_data, parsed_records):
+    async def mock_iter_collect_data(*args, **kwargs):
+        for item in parsed_records:
+            yield item
+
+    monkeypatch.setattr("src.main.iter_collect_data", mock_iter_collect_data)
+
+    output = io.StringIO()
+    scraping_data = SearchSchema(keywords=["test"], type="Repositories")
+    count = await write_search_results(scraping_data, NDJSONWriter(output))
+
+    assert count == 2
+    assert [
+        SearchDataSchema.model_validate_json(line)
+        for line in output.getvalue().splitlines()
+    ] == parsed_data
+
+
+@pytest.mark.asyncio
+async def test_fetch_page_fails_over_to_another_proxy(monkeypatch, mock_proxies):
+    dead, alive = mock_proxies[:2]
+    pool = ProxyPool(main.settings)
+    pool.record_success(dead, 0.001)
+    monkeypatch.setattr(main, "proxy_pool", pool)
+    monkeypatch.setattr(main.random, "choices", lambda population, weights: population)
+
+    async def mock_request_page(url, proxies, headers=None):
+        if proxies["https://"] == dead:
+            raise httpx.ConnectError("proxy is dead")
+        return httpx.Response(200, text="Mocked page HTML")
+
+    monkeypatch.setattr(main, "request_page", mock_request_page)
+    shared_proxy_list.set([dead, alive])
+
+    response = await main.fetch_page("https://example.com")
+
+    assert response.text == "Mocked page HTML"
+    assert pool.get_stats(dead).is_quarantined
+    assert pool.get_stats(alive).failures == 0
+
+
+@pytest.mark.asyncio
+async def test_fetch_page_failover_is_scheduled_and_budgeted(monkeypatch, mock_proxies):
+    monkeypatch.setattr(main, "proxy_pool", ProxyPool(main.settings))
+    monkeypatch.setattr(main, "retry_budget", RetryBudget(main.settings))
+    monkeypatch.setattr(main.retry_budget, "try_spend", lambda: False)
+    submitted = []
+
+    async def mock_submit(url, fetch):
+        submitted.append(url)
+        return await fetch()
+
+    async def mock_request_page(url, proxies, headers=None):
+        return httpx.Response(429)
+
+    monkeypatch.setattr(main.scheduler, "submit", mock_submit)
+    monkeypatch.setattr(main, "request_page", mock_request_page)
+    shared_proxy_list.set(mock_proxies)
+
+    response = await main.fetch_page("https://example.com")
+
+    # without budget the first failure is final, and it went through the scheduler
+    assert response.status_code == 429
+    assert submitted == ["https://example.com"]
+
+
+@pytest.mark.asyncio
+async def test_server_errors_do_not_count_against_proxies(monkeypatch, mock_proxies):
+    pool = ProxyPool(main.settings)
+    monkeypatch.setattr(main, "proxy_pool", pool)
+    requests = []
+
+    async def mock_request_page(url, proxies, headers=None):
+        requests.append(proxies["https://"])
+        return httpx.Response(503)
+
+    monkeypatch.setattr(main, "request_page", mock_request_page)
+    shared_proxy_list.set(mock_proxies)
+
+    response = await main.fetch_page("https://example.com")
+
+    assert response.status_code == 503
+    assert len(requests) == 1
+    assert not pool.get_stats(requests[0]).is_quarantined
+
+
+def test_proxy_failover_attempts_must_be_positive():
+    with pytest.raises(ValidationError):
+        Settings(proxy_failover_attempts=0)
+
+
+def test_set_job_proxies(monkeypatch, mock_proxies):
+    monkeypatch.setattr(main.settings, "proxy_mode", "random")
+    set_job_proxies(mock_proxies)
+    assert shared_proxy.get()["http://"] in mock_proxies
+    assert shared_proxy_list.get() is None
+
+    monkeypatch.setattr(main.settings, "proxy_mode", "pool")
+    set_job_proxies(mock_proxies)
+    assert shared_proxy.get() is None
+    assert shared_proxy_list.get() == mock_proxies
+
+    set_job_proxies(None)
+    assert shared_proxy_list.get() is None
+
+
+@pytest.mark.asyncio
+async def test_collect_data_without_detail_pages(monkeypatch, mock_search_page_html):
+    request = Request(method="GET", url="https://github.com/search")
+    mock_response = httpx.Response(200, text=mock_search_page_html, request=request)
+    async_mock = AsyncMock(return_value=mock_response)
+    monkeypatch.setattr(main, "get_page_html", async_mock)
+
+    result = await collect_data("https://github.com/search", URL_ONLY_STRATEGY)
+
+    async_mock.assert_awaited_once()
+    assert len(result.root) == 10
+    assert result.root[0].url == "https://github.com/openstack/openstack"
+    assert result.root[0].extra is None
+
+
+@pytest.mark.asyncio
+async def test_iter_search_links_prefetches_next_page(monkeypatch):
+    requested = []
+
+    async def mock_fetch_search_links(url):
+        requested.append(url)
+        return [f"/{url[-1]}/{index}" for index in range(10)]
+
+    monkeypatch.setattr(main, "fetch_search_links", mock_fetch_search_links)
+
+    pages = []
+    async for links in main.iter_search_links("https://github.com/search?q=a", 3):
+        await asyncio.sleep(0)
+        # the next page was requested before the current one was processed
+        pages.append((len(links), len(requested)))
+
+    assert pages == [(10, 2), (10, 3), (10, 3)]
+    assert requested[1:] == [
+        "https://github.com/search?q=a&p=2",
+        "https://github.com/search?q=a&p=3",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_search_links_stops_at_max_results(monkeypatch):
+    async def mock_fetch_search_links(url):
+        return [f"/repo/{index}" for index in range(10)]
+
+    monkeypatch.setattr(main, "fetch_search_links", mock_fetch_search_links)
+
+    pages = [
+        links
+        async for links in main.iter_search_links(
+            "https://github.com/search?q=a", 5, 15
+        )
+    ]
+
+    assert [len(links) for links in pages] == [10, 5]
+
+
+@pytest.mark.asyncio
+async def test_iter_search_links_stops_on_empty_page(monkeypatch):
+    async def mock_fetch_search_links(url):
+        return [] if url.endswith("p=2") else ["/repo/1"]
+
+    monkeypatch.setattr(main, "fetch_search_links", mock_fetch_search_links)
+
+    pages = [
+        links
+        async for links in main.iter_search_links("https://github.com/search?q=a", 5)
+    ]
+
+    assert pages == [["/repo/1"]]
+
+
+@pytest.mark.asyncio
+async def test_failed_later_page_keeps_results_found_so_far(monkeypatch):
+    async def mock_fetch_search_links(url):
+        if url.endswith("p=2"):
+            raise httpx.ConnectError("failed")
+        return ["/repo/1"]
+
+    monkeypatch.setattr(main, "fetch_search_links", mock_fetch_search_links)
+
+    pages = [
+        links
+        async for links in main.iter_search_links("https://github.com/search?q=a", 5)
+    ]
+
+    assert pages == [["/repo/1"]]
+
+
+@pytest.mark.asyncio
+async def test_collect_records_cancels_details_when_search_fails(monkeypatch):
+    cancelled = []
+
+    async def mock_iter_unique_links(*args):
+        yield ["/openstack/nova"]
+        # the detail fetch is running when the next page fails
+        await asyncio.sleep(0)
+        raise httpx.ConnectError("failed")
+
+    async def mock_fetch_search_detail(url):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+
+    monkeypatch.setattr(main, "iter_unique_links", mock_iter_unique_links)
+    monkeypatch.setattr(main, "fetch_search_detail", mock_fetch_search_detail)
+
+    with pytest.raises(httpx.ConnectError):
+        await main.collect_records("https://github.com/search?q=a")
+    await asyncio.sleep(0)
+
+    assert cancelled == ["/openstack/nova"]
+
+
+@pytest.mark.asyncio
+async def test_iter_unique_links_merges_searches(monkeypatch):
+    results = {
+        "a": ["/repo/1", "/repo/2", "/repo/3"],
+        "b": ["/repo/2", "/repo/4", "/repo/1"],
+    }
+
+    async def mock_fetch_search_links(url):
+        await asyncio.sleep(0.01 if url.endswith("b") else 0)
+        return results[url[-1]]
+
+    monkeypatch.setattr(main, "fetch_search_links", mock_fetch_search_links)
+
+    pages = [
+        links
+        async for links in main.iter_unique_links(
+            ["https://github.com/search?q=a", "https://github.com/search?q=b"]
+        )
+    ]
+    limited = [
+        links
+        async for links in main.iter_unique_links(
+            ["https://github.com/search?q=a", "https://github.com/search?q=b"],
+            max_results=4,
+        )
+    ]
+
+    assert pages == [["/repo/1", "/repo/2", "/repo/3"], ["/repo/4"]]
+    assert limited == pages
+
+
+@pytest.mark.asyncio
+async def test_iter_unique_links_raises_failed_search(monkeypatch):
+    async def mock_fetch_search_links(url):
+        if url.endswith("b"):
+            raise httpx.ConnectError("no route")
+        await asyncio.sleep(0.01)
+        return ["/repo/1"]
+
+    monkeypatch.setattr(main, "fetch_search_links", mock_fetch_search_links)
+
+    with pytest.raises(httpx.ConnectError):
+        async for _ in main.iter_unique_links(
+            ["https://github.com/search?q=a", "https://github.com/search?q=b"]
+        ):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_search_runs_planned_queries(monkeypatch):
+    searched = []
+    detailed = []
+
+    async def mock_fetch_search_links(url):
+        searched.append(url)
+        return ["/openstack/nova", f"/{len(searched)}/repo"]
+
+    async def mock_fetch_search_detail(url):
+        detailed.append(url)
+        return main.ResultRecord(url)
+
+    monkeypatch.setattr(main, "fetch_search_links", mock_fetch_search_links)
+    monkeypatch.setattr(main, "fetch_search_detail", mock_fetch_search_detail)
+
+    keywords = [f"keyword{index}" for index in range(8)]
+    results = await main.search_records(
+        SearchSchema(keywords=keywords, type="Repositories")
+    )
+
+    assert len(searched) == 2
+    assert sorted(detailed) == ["/1/repo", "/2/repo", "/openstack/nova"]
+    assert len(results) == 3
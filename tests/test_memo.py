@@ -0,0 +1,106 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from src import main
+from src.memo import DetailMemo, LRUCache
+from src.records import DetailRecord
+from src.settings import Settings
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_deduplicate_shares_inflight_fetch():
+    memo = DetailMemo(Settings())
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(
+        *(memo.deduplicate("https://github.com/a/b", fetch) for _ in range(5))
+    )
+
+    assert results == ["result"] * 5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_memo_is_persisted(tmp_path):
+    settings = Settings(memo_path=str(tmp_path / "memo.sqlite3"))
+    extra = DetailRecord("openstack", {"Python": 100.0})
+
+    memo = DetailMemo(settings)
+    await memo.put("https://github.com/openstack/nova", extra)
+    memo.clear()
+
+    assert await DetailMemo(settings).get("https://github.com/openstack/nova") == extra
+    assert await DetailMemo(settings).get("https://github.com/openstack/other") is None
+
+
+@pytest.mark.asyncio
+async def test_memo_entries_expire(monkeypatch):
+    memo = DetailMemo(Settings(memo_ttl=60))
+    extra = DetailRecord("openstack")
+    await memo.put("https://github.com/openstack/nova", extra)
+
+    assert await memo.get("https://github.com/openstack/nova") == extra
+
+    monkeypatch.setattr("src.memo.time.time", lambda: 1e12)
+    assert await memo.get("https://github.com/openstack/nova") is None
+
+
+@pytest.mark.asyncio
+async def test_processes_wait_for_claimed_url(tmp_path):
+    settings = Settings(memo_path=str(tmp_path / "memo.sqlite3"), memo_claim_poll=0.01)
+    url = "https://github.com/openstack/nova"
+    extra = DetailRecord("openstack", {"Python": 100.0})
+    fetching, waiting = DetailMemo(settings), DetailMemo(settings)
+
+    async def wait_for_claim():
+        async with waiting.claim(url) as claimed:
+            return claimed
+
+    async with fetching.claim(url) as claimed:
+        assert claimed is None
+        waiter = asyncio.create_task(wait_for_claim())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        await fetching.put(url, extra)
+
+    assert await waiter == extra
+    # the claim is released, so a later fetch of the page is not blocked
+    async with waiting.claim(url) as claimed:
+        assert claimed is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_search_detail_is_memoized(monkeypatch, mock_detail_page_html):
+    request = httpx.Request(method="GET", url="https://github.com/openstack/openstack")
+    response = httpx.Response(200, text=mock_detail_page_html, request=request)
+    get_page_html = AsyncMock(return_value=response)
+    monkeypatch.setattr(main, "get_page_html", get_page_html)
+
+    first = await main.fetch_search_detail("/openstack/openstack")
+    second = await main.fetch_search_detail("/openstack/openstack")
+
+    assert first == second
+    assert second.url == "https://github.com/openstack/openstack"
+    get_page_html.assert_awaited_once()
@@ -0,0 +1,113 @@
+import json
+
+import httpx
+import pytest
+
+from benchmarks.server import StandInServer
+from src import main
+from src.metrics import Histogram, Metrics, RequestTrace, format_labels
+from src.settings import Settings
+
+
+def test_histogram():
+    histogram = Histogram()
+    histogram.observe(0.003)
+    histogram.observe(0.2)
+    histogram.observe(20)
+
+    assert histogram.counts[0] == 1
+    assert histogram.counts[-1] == 1
+    assert histogram.summary()["count"] == 3
+    assert histogram.summary()["max"] == 20
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(Settings(metrics=False))
+    records = []
+    metrics.add_hook(records.append)
+
+    metrics.inc("requests_total")
+    metrics.observe("parse_seconds", 0.1)
+    metrics.record_request("direct", 0.1, 200, 100)
+
+    assert metrics.create_trace() is None
+    assert not metrics.counters
+    assert not metrics.histograms
+    assert records == []
+
+
+def test_record_request():
+    metrics = Metrics(Settings(metrics=True))
+    records = []
+    metrics.add_hook(records.append)
+    trace = RequestTrace()
+    trace.durations["ttfb"] = 0.05
+
+    metrics.record_request("direct", 0.1, 200, 100, trace)
+    metrics.record_request("http://proxy:80", 0.2)
+
+    assert (
+        metrics.counters["requests_total", (("proxy", "direct"), ("status", "200"))]
+        == 1
+    )
+    assert metrics.counters["bytes_received_total", (("proxy", "direct"),)] == 100
+    assert records[0]["ttfb"] == 0.05
+    assert records[1]["status"] == "error"
+
+    text = metrics.to_prometheus()
+    assert 'crawler_requests_total{proxy="direct",status="200"} 1' in text
+    assert 'crawler_request_seconds_bucket{proxy="direct",le="+Inf"} 1' in text
+    assert 'crawler_request_stage_seconds_count{stage="ttfb"} 1' in text
+
+
+def test_format_labels():
+    assert format_labels(()) == ""
+    assert format_labels((("url", 'a"b'),)) == '{url="a\\"b"}'
+
+
+@pytest.mark.asyncio
+async def test_request_trace_and_exports(monkeypatch, tmp_path):
+    server = await StandInServer().start()
+    port = server.sockets[0].getsockname()[1]
+    settings = Settings(
+        metrics=True,
+        metrics_file=str(tmp_path / "metrics.prom"),
+        metrics_summary_file=str(tmp_path / "summary.json"),
+    )
+    metrics = Metrics(settings)
+    monkeypatch.setattr(main, "metrics", metrics)
+
+    try:
+        response = await main.request_page(
+            f"http://127.0.0.1:{port}/openstack/nova", None
+        )
+    finally:
+        await main.client_manager.aclose()
+        server.close()
+        await server.wait_closed()
+    await metrics.aclose()
+
+    assert response.status_code == 200
+    stages = {
+        labels[0][1]
+        for name, labels in metrics.histograms
+        if name == "request_stage_seconds"
+    }
+    assert {"connect", "ttfb", "body"} <= stages
+    assert "crawler_requests_total" in (tmp_path / "metrics.prom").read_text()
+    summary = json.loads((tmp_path / "summary.json").read_text())
+    assert summary["counters"]["requests_total"]['{proxy="direct",status="200"}'] == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(unused_tcp_port):
+    metrics = Metrics(Settings(metrics=True, metrics_port=unused_tcp_port))
+    metrics.inc("requests_total")
+    await metrics.start_server()
+
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"http://127.0.0.1:{unused_tcp_port}/metrics")
+    await metrics.aclose()
+
+    assert response.status_code == 200
+    assert "crawler_requests_total 1" in response.text
@@ -0,0 +1,50 @@
+from src.planner import count_operators, plan_queries
+from src.settings import Settings
+
+
+def test_few_keywords_make_one_query():
+    keywords = ["openstack", "nova", "css"]
+
+    assert plan_queries(keywords, Settings()) == ["openstack OR nova OR css"]
+    assert plan_queries(["nova"], Settings()) == ["nova"]
+
+
+def test_keywords_are_sharded_by_operators():
+    keywords = [f"keyword{index}" for index in range(14)]
+
+    queries = plan_queries(keywords, Settings())
+
+    assert [query.count(" OR ") for query in queries] == [5, 5, 1]
+    assert " OR ".join(queries).split(" OR ") == keywords
+
+
+def test_keywords_are_sharded_by_length():
+    keywords = ["a" * 100, "b" * 100, "c" * 100, "d"]
+
+    queries = plan_queries(keywords, Settings(query_max_length=256))
+
+    assert queries == ["a" * 100 + " OR " + "b" * 100, "c" * 100 + " OR d"]
+    assert all(len(query) <= 256 for query in queries)
+
+
+def test_operators_inside_keywords_are_counted():
+    assert count_operators(["nova NOT compute", "css"]) == 2
+
+    queries = plan_queries(
+        ["a OR b OR c", "d", "e", "f"], Settings(query_max_operators=4)
+    )
+
+    assert queries == ["a OR b OR c OR d OR e", "f"]
+
+
+def test_query_strategies():
+    keywords = ["openstack", " nova ", "openstack", "", "css"]
+
+    assert plan_queries(keywords, Settings(query_strategy="split")) == [
+        "openstack",
+        "nova",
+        "css",
+    ]
+    assert plan_queries(keywords, Settings(query_strategy="or")) == [
+        "openstack OR nova OR css"
+    ]
@@ -0,0 +1,63 @@
+from collections import Counter
+
+from src.proxy_pool import ProxyPool
+from src.settings import Settings
+
+
+def test_select_prefers_fast_healthy_proxies(mock_proxies):
+    pool = ProxyPool(Settings())
+    fast, slow = mock_proxies[:2]
+    for _ in range(10):
+        pool.record_success(fast, 0.1)
+        pool.record_success(slow, 5)
+
+    selections = Counter(pool.select([fast, slow]) for _ in range(200))
+
+    assert selections[fast] > selections[slow]
+
+
+def test_failing_proxy_is_quarantined(mock_proxies):
+    pool = ProxyPool(Settings(proxy_quarantine=60))
+    dead, alive = mock_proxies[:2]
+
+    pool.record_failure(dead)
+
+    assert pool.get_stats(dead).is_quarantined
+    assert pool.get_stats(dead).success_rate < 1
+    assert {pool.select([dead, alive]) for _ in range(20)} == {alive}
+
+
+def test_quarantine_backoff_is_capped(mock_proxies):
+    pool = ProxyPool(Settings(proxy_quarantine=1, proxy_max_quarantine=4))
+    proxy = mock_proxies[0]
+
+    for _ in range(5):
+        pool.record_failure(proxy)
+    first_release = pool.get_stats(proxy).quarantined_until
+    pool.record_failure(proxy)
+
+    assert pool.get_stats(proxy).failures == 6
+    assert pool.get_stats(proxy).quarantined_until - first_release < 1
+
+    pool.record_success(proxy, 0.5)
+    assert not pool.get_stats(proxy).is_quarantined
+    assert pool.get_stats(proxy).failures == 0
+
+
+def test_select_excludes_tried_proxies(mock_proxies):
+    pool = ProxyPool(Settings())
+    proxy_list = mock_proxies[:2]
+
+    assert pool.select(proxy_list, exclude={proxy_list[0]}) == proxy_list[1]
+    # everything was tried already, so any proxy of the list is fine
+    assert pool.select(proxy_list, exclude=set(proxy_list)) in proxy_list
+
+
+def test_select_when_every_proxy_is_quarantined(mock_proxies):
+    pool = ProxyPool(Settings(proxy_quarantine=60))
+    first, second = mock_proxies[:2]
+    pool.record_failure(first)
+    pool.record_failure(second)
+    pool.record_failure(second)
+
+    assert pool.select([first, second]) == first
@@ -0,0 +1,59 @@
+import pickle
+
+from src.records import (
+    BatchRecord,
+    DetailRecord,
+    ResultRecord,
+    dumps,
+    dumps_list,
+    to_search_result,
+)
+from src.schema import BatchResultSchema, SearchDataSchema, SearchResultSchema
+
+
+def test_detail_record_interns_names():
+    first = DetailRecord.create("open" + "stack", {"Pyt" + "hon": 100.0})
+    second = DetailRecord.create("open" + "stack", {"Pyt" + "hon": 50.0})
+
+    assert first.owner is second.owner
+    assert next(iter(first.language_stats)) is next(iter(second.language_stats))
+
+
+def test_dumps_matches_model_dump(parsed_data, parsed_records):
+    error = ResultRecord("https://github.com/a/b", error='ReadTimeout: "slow" ✗\n')
+    records = [*parsed_records, error, ResultRecord("https://github.com/a/c")]
+    schemas = [
+        *parsed_data,
+        *(SearchDataSchema.model_validate(r.to_dict()) for r in records[-2:]),
+    ]
+
+    for record, schema in zip(records, schemas):
+        assert dumps(record) == schema.model_dump_json()
+        assert dumps(record, indent=4) == schema.model_dump_json(indent=4)
+    for indent in (None, 4):
+        expected = SearchResultSchema(schemas).model_dump_json(indent=indent)
+        assert dumps_list(records, indent) == expected
+
+
+def test_dumps_batch_record(parsed_data, parsed_records):
+    record = BatchRecord(2, parsed_records)
+    failed = BatchRecord(3, error="ValidationError: bad input")
+
+    assert (
+        dumps(record)
+        == BatchResultSchema(line=2, results=parsed_data).model_dump_json()
+    )
+    assert dumps(failed) == failed.to_schema().model_dump_json()
+    assert BatchResultSchema.model_validate_json(dumps(record)) == record.to_schema()
+
+
+def test_to_search_result(parsed_data, parsed_records):
+    result = to_search_result(parsed_records)
+
+    assert isinstance(result, SearchResultSchema)
+    assert result.root == parsed_data
+
+
+def test_records_can_be_pickled(parsed_records):
+    # process parse executors send records back to the event loop
+    assert pickle.loads(pickle.dumps(parsed_records)) == parsed_records
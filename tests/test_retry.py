@@ -0,0 +1,199 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src import main
+from src.proxy_pool import ProxyPool
+from src.retry import LatencyTracker, RetryBudget, first_successful, get_backoff
+from src.settings import Settings
+
+
+def test_retry_budget():
+    budget = RetryBudget(Settings(retry_budget_min=1, retry_budget_ratio=0.5))
+
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+
+def test_retry_budget_is_capped():
+    budget = RetryBudget(
+        Settings(retry_budget_min=1, retry_budget_max=2, retry_budget_ratio=0.5)
+    )
+    for _ in range(1000):
+        budget.record_request()
+
+    assert budget.try_spend()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+
+def test_get_backoff():
+    settings = Settings(retry_backoff=1, retry_max_backoff=3)
+
+    assert all(0 <= get_backoff(0, settings) <= 1 for _ in range(20))
+    assert all(0 <= get_backoff(10, settings) <= 3 for _ in range(20))
+
+
+def test_latency_tracker():
+    tracker = LatencyTracker(Settings(hedge_min_samples=20))
+    for latency in range(1, 20):
+        tracker.add(latency / 100)
+    assert tracker.get_hedge_delay() is None
+
+    tracker.add(0.2)
+    assert tracker.get_hedge_delay() == pytest.approx(0.19, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_first_successful_hedges_slow_request():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(1 if calls == 1 else 0)
+        return calls
+
+    assert await first_successful(fetch, hedge_delay=0.01) == 2
+
+
+@pytest.mark.asyncio
+async def test_first_successful_raises_when_every_attempt_fails():
+    async def fetch():
+        raise httpx.ConnectError("failed")
+
+    with pytest.raises(httpx.ConnectError):
+        await first_successful(fetch, hedge_delay=None)
+
+
+@pytest.mark.asyncio
+async def test_get_page_html_with_retries(monkeypatch):
+    responses = [httpx.Response(503), httpx.ConnectError("failed"), httpx.Response(200)]
+
+    async def mock_get_page_html(url):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(main, "get_page_html", mock_get_page_html)
+    monkeypatch.setattr(main.settings, "retry_backoff", 0)
+
+    response = await main.get_page_html_with_retries("https://example.com")
+
+    assert response.status_code == 200
+    assert responses == []
+
+
+@pytest.mark.asyncio
+async def test_get_page_html_with_retries_gives_up(monkeypatch):
+    async def mock_get_page_html(url):
+        return httpx.Response(503)
+
+    monkeypatch.setattr(main, "get_page_html", mock_get_page_html)
+    monkeypatch.setattr(main.settings, "retry_backoff", 0)
+    monkeypatch.setattr(main.settings, "max_retries", 1)
+
+    response = await main.get_page_html_with_retries("https://example.com")
+
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_failed_detail_page_is_marked(monkeypatch, mock_detail_page_html):
+    async def mock_get_page_html(url):
+        if url.endswith("/broken"):
+            raise httpx.ConnectError("failed")
+        request = httpx.Request(method="GET", url=url)
+        return httpx.Response(200, text=mock_detail_page_html, request=request)
+
+    monkeypatch.setattr(main, "get_page_html", mock_get_page_html)
+    monkeypatch.setattr(main.settings, "retry_backoff", 0)
+
+    result = await main.parse_search_details(["/openstack/nova", "/openstack/broken"])
+
+    assert result.root[0].extra.owner == "openstack"
+    assert result.root[0].error is None
+    assert result.root[1].extra is None
+    assert result.root[1].error == "ConnectError: failed"
+
+
+@pytest.mark.asyncio
+async def test_error_page_is_not_parsed(monkeypatch):
+    async def mock_get_page_html(url):
+        return httpx.Response(503, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(main, "get_page_html", mock_get_page_html)
+    monkeypatch.setattr(main.settings, "retry_backoff", 0)
+
+    result = await main.parse_search_details(["/openstack/nova"])
+
+    assert result.root[0].extra is None
+    assert result.root[0].error == "HTTP 503"
+    with pytest.raises(httpx.HTTPStatusError):
+        await main.fetch_search_links("https://github.com/search?q=nova")
+
+
+@pytest.mark.asyncio
+async def test_latency_tracker_samples_network_fetches_only(monkeypatch):
+    tracker = LatencyTracker(main.settings)
+    monkeypatch.setattr(main, "latency_tracker", tracker)
+
+    async def mock_get_page_html(url):
+        # a fresh cache hit, no request is made
+        return httpx.Response(200)
+
+    monkeypatch.setattr(main, "get_page_html", mock_get_page_html)
+    await main.get_page_html_with_retries("https://example.com", hedge=True)
+    assert len(tracker.latencies) == 0
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="page"))
+    async with httpx.AsyncClient(transport=transport) as client:
+        monkeypatch.setattr(main.client_manager, "get_client", lambda proxies: client)
+        await main.request_page("https://example.com", None)
+    assert len(tracker.latencies) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "answer, tokens",
+    [
+        # failover does not retry 503, the retry loop does: 2 retries
+        (httpx.Response(503), 10 + 3 * 0.2 - 2),
+        # the retry loop does not repeat the failover on 429: 2 failovers
+        (httpx.Response(429), 10 + 0.2 - 2),
+        (httpx.ConnectError("failed"), 10 + 0.2 - 2),
+    ],
+)
+async def test_retry_layers_do_not_multiply(monkeypatch, mock_proxies, answer, tokens):
+    budget = RetryBudget(Settings(retry_budget_min=10, retry_budget_ratio=0.2))
+    monkeypatch.setattr(main, "retry_budget", budget)
+    monkeypatch.setattr(main, "proxy_pool", ProxyPool(main.settings))
+    monkeypatch.setattr(main.settings, "retry_backoff", 0)
+    monkeypatch.setattr(main.settings, "max_retries", 2)
+    monkeypatch.setattr(main.settings, "proxy_failover_attempts", 3)
+    requests = 0
+
+    async def mock_request_page(url, proxies, headers=None):
+        nonlocal requests
+        requests += 1
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(main, "request_page", mock_request_page)
+    main.shared_proxy_list.set(mock_proxies[:3])
+
+    try:
+        await main.get_page_html_with_retries("https://example.com")
+    except httpx.ConnectError:
+        pass
+
+    assert requests == 3
+    assert budget.tokens == pytest.approx(tokens)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+
+from src.scheduler import FetchScheduler, QueueWaitStats, TokenBucket
+from src.settings import Settings
+
+
+@pytest.mark.asyncio
+async def test_scheduler_limits_concurrency():
+    scheduler = FetchScheduler(
+        Settings(max_concurrency=2, queue_size=10, host_rate_limit=0)
+    )
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fetch():
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "ok"
+
+    results = await asyncio.gather(
+        *(scheduler.submit("https://example.com/", fetch) for _ in range(6))
+    )
+
+    assert results == ["ok"] * 6
+    assert max_in_flight == 2
+    assert scheduler.wait_stats.count == 6
+    assert scheduler.wait_stats.max > 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_propagates_errors():
+    scheduler = FetchScheduler(Settings(host_rate_limit=0))
+
+    async def fetch():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await scheduler.submit("https://example.com/", fetch)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_uses_bucket_per_host():
+    scheduler = FetchScheduler(Settings())
+    scheduler._start()
+
+    bucket = scheduler.get_bucket("https://example.com/a")
+
+    assert scheduler.get_bucket("https://example.com/b") is bucket
+    assert scheduler.get_bucket("https://github.com/a") is not bucket
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_host_does_not_hold_slots():
+    scheduler = FetchScheduler(
+        Settings(max_concurrency=1, host_rate_limit=1, host_burst=1)
+    )
+
+    async def fetch():
+        return time.monotonic()
+
+    started = time.monotonic()
+    await scheduler.submit("https://slow.example.com/", fetch)
+    # the second request to the same host waits about a second for its token
+    throttled = asyncio.create_task(
+        scheduler.submit("https://slow.example.com/", fetch)
+    )
+    await asyncio.sleep(0)
+    other = await scheduler.submit("https://other.example.com/", fetch)
+    throttled.cancel()
+
+    assert other - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=100, capacity=1)
+
+    started = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+
+    # the first token is available at once, the next two take ~10ms each
+    assert time.monotonic() - started >= 0.015
+
+
+def test_queue_wait_stats():
+    stats = QueueWaitStats()
+    assert stats.mean == 0
+
+    stats.add(1)
+    stats.add(3)
+
+    assert stats.count == 2
+    assert stats.mean == 2
+    assert stats.max == 3
@@ -1,3 +1,6 @@
+import pytest
+from pydantic import ValidationError
+
 from src.schema import SearchSchema
 
 
@@ -16,3 +19,18 @@ def test_search_schema():
     assert isinstance(result, dict), "The result is not a dictionary."
     assert result["q"] == expected["q"], "The query parameters are incorrect."
     assert result["type"] == expected["type"], "The query parameters are incorrect."
+
+
+def test_search_schema_limits():
+    scraping_data = SearchSchema(keywords=["nova"], type="Repositories")
+    assert scraping_data.max_pages == 1
+    assert scraping_data.max_results is None
+
+    with pytest.raises(ValidationError):
+        SearchSchema(keywords=["nova"], type="Repositories", max_pages=0)
+
+
+def test_search_schema_query():
+    scraping_data = SearchSchema(keywords=["openstack", "nova"], type="Wikis")
+
+    assert scraping_data.get_query_params("nova") == {"q": "nova", "type": "wikis"}
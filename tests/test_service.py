@@ -0,0 +1,98 @@
+import httpx
+import pytest
+import pytest_asyncio
+
+from src import main
+from src.service import SearchService
+from src.settings import Settings
+
+JOB = {"keywords": ["openstack"], "type": "Repositories"}
+
+
+@pytest_asyncio.fixture
+async def service():
+    service = SearchService(Settings(service_port=0))
+    await service.start()
+    yield service
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_search(monkeypatch, service, parsed_data, parsed_records):
+    async def mock_search_records(scraping_data):
+        assert scraping_data.keywords == ["openstack"]
+        return parsed_records
+
+    monkeypatch.setattr(main, "search_records", mock_search_records)
+
+    async with httpx.AsyncClient(base_url=service.address) as client:
+        response = await client.post("/search", json=JOB)
+
+    assert response.status_code == 200
+    assert response.json() == [item.model_dump() for item in parsed_data]
+
+
+@pytest.mark.asyncio
+async def test_stream_search(monkeypatch, service, parsed_records):
+    async def mock_iter_search(scraping_data):
+        yield parsed_records[0]
+        raise RuntimeError("search page failed")
+
+    monkeypatch.setattr(main, "iter_search", mock_iter_search)
+
+    async with httpx.AsyncClient(base_url=service.address) as client:
+        response = await client.post("/search", params={"stream": "1"}, json=JOB)
+
+    lines = response.text.splitlines()
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert lines == [
+        parsed_records[0].to_json(),
+        '{"error": "RuntimeError: search page failed"}',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failed_search(monkeypatch, service):
+    async def mock_search_records(scraping_data):
+        raise httpx.ConnectError("no route")
+
+    monkeypatch.setattr(main, "search_records", mock_search_records)
+
+    async with httpx.AsyncClient(base_url=service.address) as client:
+        response = await client.post("/search", json=JOB)
+
+    assert response.status_code == 502
+    assert response.json() == {"error": "ConnectError: no route"}
+
+
+@pytest.mark.asyncio
+async def test_bad_requests(service):
+    async with httpx.AsyncClient(base_url=service.address) as client:
+        invalid = await client.post("/search", json={**JOB, "type": "Commits"})
+        wrong_method = await client.get("/search")
+        missing = await client.get("/jobs")
+        health = await client.get("/health")
+
+    assert invalid.status_code == 400
+    assert "type" in invalid.json()["error"]
+    assert wrong_method.status_code == 405
+    assert missing.status_code == 404
+    assert health.json() == {"status": "ok", "jobs": 0}
+
+
+@pytest.mark.asyncio
+async def test_unix_socket(tmp_path):
+    path = str(tmp_path / "crawler.sock")
+    service = SearchService(Settings(service_socket=path))
+    await service.start()
+    try:
+        transport = httpx.AsyncHTTPTransport(uds=path)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://crawler"
+        ) as client:
+            response = await client.get("/health")
+    finally:
+        await service.aclose()
+
+    assert service.address == path
+    assert response.json()["status"] == "ok"
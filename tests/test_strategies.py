@@ -0,0 +1,39 @@
+from src.records import DetailRecord
+from src.schema import SearchSchema
+from src.strategies import (
+    OWNER_FROM_URL_STRATEGY,
+    REPOSITORY_STRATEGY,
+    URL_ONLY_STRATEGY,
+    get_search_strategy,
+)
+
+
+def test_get_search_strategy():
+    repositories = SearchSchema(keywords=["nova"], type="Repositories")
+    urls_only = SearchSchema(keywords=["nova"], type="Repositories", extra=False)
+    issues = SearchSchema(keywords=["nova"], type="Issues")
+    wikis = SearchSchema(keywords=["nova"], type="Wikis", extra=False)
+
+    assert get_search_strategy(repositories) is REPOSITORY_STRATEGY
+    assert get_search_strategy(urls_only) is URL_ONLY_STRATEGY
+    assert get_search_strategy(issues) is OWNER_FROM_URL_STRATEGY
+    assert get_search_strategy(wikis) is OWNER_FROM_URL_STRATEGY
+
+
+def test_url_only_strategy(search_page_result):
+    results = URL_ONLY_STRATEGY.parse_results(search_page_result, "https://github.com")
+
+    assert not URL_ONLY_STRATEGY.fetch_details
+    assert results[0].url == "https://github.com/openstack/openstack"
+    assert all(result.extra is None for result in results)
+
+
+def test_owner_from_url_strategy():
+    links = ["/openstack/nova/issues/1", "/fog/fog-openstack/wiki/Home", "/"]
+
+    results = OWNER_FROM_URL_STRATEGY.parse_results(links, "https://github.com")
+
+    assert results[0].url == "https://github.com/openstack/nova/issues/1"
+    assert results[0].extra == DetailRecord("openstack")
+    assert results[1].extra == DetailRecord("fog")
+    assert results[2].extra is None
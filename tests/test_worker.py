@@ -0,0 +1,75 @@
+import io
+import json
+
+import httpx
+import pytest
+
+from src import main
+from src.jobqueue import SQLiteJobQueue
+from src.schema import JobResultSchema
+from src.settings import Settings
+from src.worker import Worker, enqueue, write_results
+
+JOB = {"keywords": ["openstack"], "type": "Repositories"}
+
+
+@pytest.fixture
+def queue_settings(tmp_path, monkeypatch):
+    settings = Settings(
+        queue_path=str(tmp_path / "queue.sqlite3"),
+        queue_max_attempts=2,
+        queue_poll_interval=0.01,
+    )
+    monkeypatch.setattr(main, "settings", settings)
+    return settings
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_queued_jobs(monkeypatch, queue_settings, parsed_records):
+    async def mock_search_records(scraping_data):
+        if scraping_data.keywords == ["down"]:
+            raise httpx.ConnectError("no route")
+        return parsed_records
+
+    monkeypatch.setattr(main, "search_records", mock_search_records)
+
+    jobs = [JOB, {**JOB, "type": "Commits"}, {**JOB, "keywords": ["down"]}, JOB]
+    input_file = io.StringIO("\n".join(json.dumps(job) for job in jobs) + "\n\n")
+    assert await enqueue(input_file) == 4
+
+    queue = SQLiteJobQueue(queue_settings)
+    processed = await Worker(queue, "worker").run(drain=True)
+
+    assert processed == 5  # the job that could not reach the server ran twice
+    assert await queue.count() == {"done": 2, "failed": 2}
+    await queue.aclose()
+
+    output_file = io.StringIO()
+    assert await write_results(output_file) == 4
+    records = [
+        JobResultSchema.model_validate_json(line)
+        for line in output_file.getvalue().splitlines()
+    ]
+    assert [record.job for record in records] == [1, 2, 3, 4]
+    assert records[0].results == [record.to_schema() for record in parsed_records]
+    assert records[1].error.startswith("ValidationError")
+    assert records[2].error == "ConnectError: no route"
+
+
+@pytest.mark.asyncio
+async def test_stopped_worker_finishes_running_jobs(monkeypatch, queue_settings):
+    queue = SQLiteJobQueue(queue_settings.model_copy(update={"worker_concurrency": 1}))
+    worker = Worker(queue, "worker")
+
+    async def mock_search_records(scraping_data):
+        worker.stop()
+        return []
+
+    monkeypatch.setattr(main, "search_records", mock_search_records)
+    await queue.put([json.dumps(JOB)] * 3)
+
+    processed = await worker.run()
+
+    assert processed == 1
+    assert await queue.count() == {"done": 1, "queued": 2}
+    await queue.aclose()
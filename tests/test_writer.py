@@ -0,0 +1,55 @@
+import io
+import json
+
+import pytest
+
+from src.schema import SearchResultSchema
+from src.writer import JSONWriter, NDJSONWriter, ResultWriter
+
+
+def test_json_writer_matches_model_dump(parsed_data):
+    for indent in (None, 4):
+        output = io.StringIO()
+        with JSONWriter(output, indent=indent) as writer:
+            for item in parsed_data:
+                writer.write(item)
+
+        expected = SearchResultSchema(parsed_data).model_dump_json(indent=indent)
+        assert output.getvalue() == expected + "\n"
+
+
+def test_json_writer_without_items():
+    output = io.StringIO()
+    with JSONWriter(output, indent=4):
+        pass
+
+    assert json.loads(output.getvalue()) == []
+
+
+def test_ndjson_writer(parsed_data):
+    output = io.StringIO()
+    with NDJSONWriter(output) as writer:
+        for item in parsed_data:
+            writer.write(item)
+
+    lines = output.getvalue().splitlines()
+    assert len(lines) == len(parsed_data)
+    assert json.loads(lines[0])["url"] == parsed_data[0].url
+
+
+def test_json_writer_writes_records(parsed_data, parsed_records):
+    output = io.StringIO()
+    with JSONWriter(output, indent=4) as writer:
+        for item in parsed_records:
+            writer.write(item)
+
+    expected = SearchResultSchema(parsed_data).model_dump_json(indent=4)
+    assert output.getvalue() == expected + "\n"
+
+
+def test_result_writer_requires_write():
+    class IncompleteWriter(ResultWriter):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteWriter(io.StringIO())